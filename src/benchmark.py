@@ -0,0 +1,134 @@
+import json
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple, Type
+
+import numpy as np
+
+from src.cache import ResultCache
+from src.instrumentation import Profiler, aggregate
+from src.pairings import Pairings, Random
+from src.votes import Vote
+
+
+class Config(NamedTuple):
+    """
+    One cell of a benchmark grid: `trials` independent runs of vote_cls(N, budget, comparisons_cls, rematch, p)
+    """
+
+    label: str
+    vote_cls: Type[Vote]
+    comparisons_cls: Type[Pairings] = Random
+    N: int = 500
+    budget: int = 15000
+    p: float = 0.9
+    rematch: int = 1
+    trials: int = 20
+
+
+def run_trial(config: Config, seed: np.random.SeedSequence, cache: ResultCache = None, profile=None):
+    """
+    Runs a single trial, returns its score and timing
+
+    The same config and seed replay the same trial, or read it from the cache
+    profile: None, "time" or "memory" to add the report of a Profiler to the result
+    """
+    start = time.perf_counter()
+    profiler = Profiler(memory=profile == "memory") if profile is not None else None
+    vote = config.vote_cls(
+        config.N,
+        config.budget,
+        config.comparisons_cls,
+        rematch=config.rematch,
+        p=config.p,
+        rng=seed,
+        cache=cache,
+        profiler=profiler,
+    )
+    score = vote.score()
+
+    result = {"score": float(score), "seconds": time.perf_counter() - start, "cached": vote.cached is not None}
+    if profiler is not None:
+        profiler.stop()
+        result["profile"] = profiler.report()
+
+    return result
+
+
+def replay_trial(config: Config, record: dict):
+    """Runs again the trial of a record from the jsonl log written by run"""
+    seed = np.random.SeedSequence(int(record["entropy"]), spawn_key=tuple(record["spawn_key"]))
+    return run_trial(config, seed)
+
+
+def run(
+    configs: list[Config],
+    seed=None,
+    workers=None,
+    output="benchmark.json",
+    log=None,
+    cache: ResultCache = None,
+    profile=None,
+    profile_output="profile.json",
+):
+    """
+    Runs every trial of every config on a process pool
+
+    seed: root entropy, every trial gets its own child seed sequence (None for fresh entropy)
+    workers: size of the process pool (None for os.cpu_count()), with 1 worker trials run in process
+    output: json file written at the end, with the layout {label: [scores]} used by the notebooks (None to skip)
+    log: jsonl file where each trial is appended as soon as it finishes (None to skip)
+    cache: ResultCache of the trials, a rerun with the same seed only computes the trials missing from it
+    profile: None, "time" or "memory" to profile every trial (see instrumentation.Profiler)
+    profile_output: json file where the profiles of the trials of each config are aggregated as {label: report}
+
+    Returns the {label: [scores]} dict, scores in trial order
+    """
+    root = np.random.SeedSequence(seed)
+    trials = [(config, trial) for config in configs for trial in range(config.trials)]
+    # Each trial seed only depends on the label and the trial number, so extending a sweep keeps the previous trials
+    seeds = [
+        np.random.SeedSequence(root.entropy, spawn_key=(zlib.crc32(config.label.encode()), trial))
+        for config, trial in trials
+    ]
+    scores = {config.label: [None] * config.trials for config in configs}
+    profiles = {config.label: [] for config in configs}
+
+    log_file = open(log, "a") if log is not None else None
+
+    def collect(config, trial, seed, result):
+        scores[config.label][trial] = result["score"]
+        if "profile" in result:
+            profiles[config.label].append(result["profile"])
+        if log_file is not None:
+            record = {"label": config.label, "trial": trial, "entropy": str(root.entropy), "spawn_key": seed.spawn_key}
+            log_file.write(json.dumps({**record, **result}) + "\n")
+            log_file.flush()
+
+    try:
+        if workers == 1:
+            for (config, trial), seed in zip(trials, seeds):
+                collect(config, trial, seed, run_trial(config, seed, cache, profile))
+        else:
+            with ProcessPoolExecutor(workers or os.cpu_count()) as executor:
+                futures = {
+                    executor.submit(run_trial, config, seed, cache, profile): (config, trial, seed)
+                    for (config, trial), seed in zip(trials, seeds)
+                }
+                for future in as_completed(futures):
+                    collect(*futures[future], future.result())
+    finally:
+        if log_file is not None:
+            log_file.close()
+
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(scores, f, indent=2)
+
+    if profile is not None and profile_output is not None:
+        with open(profile_output, "w") as f:
+            json.dump({label: aggregate(reports) for label, reports in profiles.items()}, f, indent=2)
+
+    return scores
@@ -1,40 +1,139 @@
 import numpy as np
+from scipy import optimize, sparse
+from scipy.special import expit
 
 from src.utilities import *
 from src.votes import Vote
 
 
+def bradley_terry_mm(M: np.ndarray, tol=1e-6, max_iterations=1000, scores=None):
+    """
+    Minorization-maximization solver for the Bradley-Terry model, vectorized over the rows of M
+
+    M: comparison matrix (dense or scipy.sparse) with (i,j) the number of times i beats j
+    tol: stop when the L1 change of the normalized scores falls below tol
+    max_iterations: hard cap on the number of iterations (tol=0 runs exactly max_iterations)
+    scores: optional previous score vector to warm start from
+
+    Returns (scores, iterations) with scores normalized to sum to 1
+    """
+    M = sparse.csr_array(M, dtype=float)
+    N = M.shape[0]
+
+    # https://en.wikipedia.org/wiki/Bradley-Terry_model#Estimating_the_parameters
+    wins = M.sum(axis=1)
+    # Only the pairs that actually met contribute to the denominators
+    games = sparse.coo_array(M + M.T)
+    games.sum_duplicates()
+    off_diagonal = games.row != games.col
+    rows = games.row[off_diagonal]
+    cols = games.col[off_diagonal]
+    games = games.data[off_diagonal]
+
+    if scores is None or len(scores) == 0:
+        scores = np.full(N, 1 / N)
+    else:
+        scores = np.array(scores, dtype=float)
+        scores /= scores.sum()
+
+    iterations = 0
+    while iterations < max_iterations:
+        pair_sums = scores[rows] + scores[cols]
+        # Pairs of zero scores don't contribute to the denominator, vanishing ones overflow to a zero score
+        with np.errstate(over="ignore"):
+            ratios = np.divide(games, pair_sums, out=np.zeros_like(games), where=pair_sums != 0)
+        D = np.bincount(rows, weights=ratios, minlength=N)
+
+        new_scores = np.divide(wins, D, out=np.zeros(N), where=D != 0)
+        new_scores /= new_scores.sum()
+        iterations += 1
+
+        change = np.abs(new_scores - scores).sum()
+        scores = new_scores
+        if change <= tol:
+            break
+
+    return scores, iterations
+
+
 def bradley_terry_scores(M: np.ndarray[int], iterations=20, scores=[]):
     """
     Returns the individual scores of a matrix of win/loss comparisons, as computed by the Bradley-Terry algorithm
+
+    Runs exactly `iterations` MM updates, see bradley_terry_mm for the tolerance based version
     """
-    N = M.shape[0]
+    new_scores, _ = bradley_terry_mm(M, tol=0, max_iterations=iterations, scores=scores)
+    return list(new_scores)
 
-    if scores == []:
-        # Initial scores
-        scores = [1 / N for _ in range(N)]
 
-    # https://en.wikipedia.org/wiki/Bradley-Terry_model#Estimating_the_parameters
-    def compute_score(i):
-        W_i = sum(M[i])
-        D = 0
-        for j in range(N):
-            if j != i and (scores[i] + scores[j]) != 0:
-                D += (M[i][j] + M[j][i]) / (scores[i] + scores[j])
+def sparse_bradley_terry_scores(M, regularization=1e-2, tol=1e-8, max_iterations=200, scores=None):
+    """
+    Bradley-Terry scores of a sparse comparison matrix, by Newton-CG on the log-likelihood of the log-strengths
+
+    M: comparison matrix (any scipy.sparse format or dense array) with (i,j) the number of times i beats j
+    regularization: weight of an L2 prior on the log-strengths. It keeps the estimate finite for entries that never
+    lost or never won, and centers components of the comparison graph that never met around the same value
+    scores: optional previous score vector to warm start from
+
+    The gradient and the Hessian-vector products only touch the nonzeros of M, so the cost of an iteration is
+    linear in the number of distinct pairs that met.
+
+    Returns (scores, iterations) with scores normalized to sum to 1
+    """
+    M = sparse.coo_array(M)
+    M.sum_duplicates()
+    N = M.shape[0]
 
-        return W_i / D
+    off_diagonal = M.row != M.col
+    winners = M.row[off_diagonal]
+    losers = M.col[off_diagonal]
+    counts = M.data[off_diagonal].astype(float)
 
-    new_scores = [compute_score(i) for i in range(N)]
-    normalized_new_scores = [v / sum(new_scores) for v in new_scores]
+    def negative_log_likelihood(theta):
+        d = theta[winners] - theta[losers]
+        # -log(sigmoid(d)) and its derivative
+        loss = counts @ np.logaddexp(0, -d) + regularization / 2 * theta @ theta
+        q = counts * expit(-d)
+        gradient = regularization * theta - np.bincount(winners, q, N) + np.bincount(losers, q, N)
+        return loss, gradient
 
-    if iterations == 1:
-        return normalized_new_scores
+    def hessian_product(theta, v):
+        p = expit(theta[winners] - theta[losers])
+        dv = counts * p * (1 - p) * (v[winners] - v[losers])
+        return regularization * v + np.bincount(winners, dv, N) - np.bincount(losers, dv, N)
+
+    if scores is None or len(scores) == 0:
+        theta = np.zeros(N)
     else:
-        iterations -= 1
-        return bradley_terry_scores(M, iterations, normalized_new_scores)
+        scores = np.asarray(scores, dtype=float)
+        theta = np.log(np.maximum(scores, np.finfo(float).tiny))
+        theta -= theta.mean()
+
+    result = optimize.minimize(
+        negative_log_likelihood,
+        theta,
+        method="Newton-CG",
+        jac=True,
+        hessp=hessian_product,
+        options={"xtol": tol, "maxiter": max_iterations},
+    )
+
+    scores = np.exp(result.x - result.x.max())
+    return scores / scores.sum(), result.nit
 
 
 class BradleyTerry(Vote):
+    scores = None
+
+    def rank(self):
+        # Warm start from the previous ranking, if any
+        self.scores, self.iterations = bradley_terry_mm(self.comparisons.votes.sparse, scores=self.scores)
+        self.ranking = ranking_from_scores(self.scores)
+        return self.ranking
+
+
+class SparseBradleyTerry(BradleyTerry):
     def rank(self):
-        self.ranking = ranking_from_scores(bradley_terry_scores(self.comparisons.matrix))
+        self.scores, self.iterations = sparse_bradley_terry_scores(self.comparisons.votes.sparse, scores=self.scores)
+        self.ranking = ranking_from_scores(self.scores)
         return self.ranking
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+
+SRC = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(SRC), ".cache", "results")
+
+_code_version = None
+
+
+def code_version() -> str:
+    """Hash of the source code (src/ without the tests), results computed by another version are never reused"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(SRC):
+            dirs[:] = sorted(d for d in dirs if d not in ("tests", "__pycache__"))
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    path = os.path.join(root, name)
+                    digest.update(os.path.relpath(path, SRC).encode())
+                    with open(path, "rb") as f:
+                        digest.update(f.read())
+        _code_version = digest.hexdigest()
+
+    return _code_version
+
+
+def seed_fingerprint(rng):
+    """
+    A json-able description of a seed that replays the same random numbers: an int or a SeedSequence
+
+    None for fresh entropy or a Generator, whose results can't be reproduced
+    """
+    if isinstance(rng, (int, np.integer)):
+        return int(rng)
+    if isinstance(rng, np.random.SeedSequence):
+        return {"entropy": str(rng.entropy), "spawn_key": list(rng.spawn_key), "pool_size": rng.pool_size}
+    return None
+
+
+class ResultCache:
+    """
+    Content-addressed store of trial results on disk, one json file per key
+
+    Reading a result marks it as recently used. Once the files exceed max_bytes, the least recently used ones are
+    evicted.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=64 * 2**20) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, **fields) -> str:
+        """Address of the result of a computation described by json-able fields, with the current code version"""
+        description = json.dumps({**fields, "code_version": code_version()}, sort_keys=True)
+        return hashlib.sha256(description.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key) -> dict | None:
+        try:
+            with open(self._path(key)) as f:
+                result = json.load(f)
+            os.utime(self._path(key))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        return result
+
+    def put(self, key, result: dict):
+        # Written under a temporary name then renamed, readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp, self._path(key))
+
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used results until the cache fits in max_bytes"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                os.remove(os.path.join(self.directory, name))
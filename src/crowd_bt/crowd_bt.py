@@ -1,10 +1,11 @@
 # https://github.com/anishathalye/gavel/blob/master/gavel/crowd_bt.py
 
+import numpy as np
 from numpy import exp, log
 from scipy.special import betaln, psi
 
 from src.crowd_bt.judge import *
-from src.crowd_bt.models import Annotator, Item
+from src.crowd_bt.models import Annotator, Annotators, Items
 from src.pairings import Pairings
 from src.utilities import *
 from src.votes import Vote
@@ -22,9 +23,7 @@ ALPHA_PRIOR = float(10)
 BETA_PRIOR = float(1)
 EPSILON = 0.25  # epsilon-greedy
 
-
-def argmax(f, xs):
-    return max(xs, key=f)
+# All the functions below work elementwise: they take scalars or arrays (broadcast together) and return the same
 
 
 # via https://en.wikipedia.org/wiki/Normal_distribution
@@ -103,8 +102,8 @@ def update_sigma_sqs(alpha, beta, mu_winner, sigma_sq_winner, mu_loser, sigma_sq
         exp(mu_winner) * exp(mu_loser)
     ) / ((exp(mu_winner) + exp(mu_loser)) ** 2)
 
-    updated_sigma_sq_winner = sigma_sq_winner * max(1 + sigma_sq_winner * mult, KAPPA)
-    updated_sigma_sq_loser = sigma_sq_loser * max(1 + sigma_sq_loser * mult, KAPPA)
+    updated_sigma_sq_winner = sigma_sq_winner * np.maximum(1 + sigma_sq_winner * mult, KAPPA)
+    updated_sigma_sq_loser = sigma_sq_loser * np.maximum(1 + sigma_sq_loser * mult, KAPPA)
 
     return (updated_sigma_sq_winner, updated_sigma_sq_loser)
 
@@ -130,18 +129,19 @@ def update_annotator(alpha, beta, mu_winner, sigma_sq_winner, mu_loser, sigma_sq
 
 
 class CrowdBTPairings(Pairings):
-    def __init__(self, N) -> None:
-        super().__init__(N)
+    def __init__(self, N, rng=None, annotators=None) -> None:
+        """annotators: number of simulated judges, N by default"""
+        super().__init__(N, rng)
 
-        self.annotators = [Annotator() for _ in range(N)]
-        self.items = [Item(i) for i in range(N)]
+        self.items = Items(N)
+        self.annotators = Annotators(N if annotators is None else annotators, self.items)
         self.current_annotator = None
 
     def next_comparison(self) -> tuple[int, int]:
-        annotator: Annotator = np.random.choice(self.annotators)
-        maybe_init_annotator(annotator, self.items)
+        annotator: Annotator = self.annotators[self.rng.integers(len(self.annotators))]
+        maybe_init_annotator(annotator, self.items, self.rng)
 
-        annotator.update_next(choose_next(annotator, self.items))
+        annotator.update_next(choose_next(annotator, self.items, self.rng))
         prev = annotator.prev
         next = annotator.next
 
@@ -151,14 +151,14 @@ class CrowdBTPairings(Pairings):
 
 
 class CrowdBT(Vote):
-    def single_vote(self, pair: tuple, ranking: list, p: int = 1):
+    def single_vote(self, pair: tuple, ranking: list = None, p: float = None):
         comparisons: CrowdBTPairings = self.comparisons
-        loser_id, winner_id = vote(pair, ranking, p)
+        loser_id, winner_id = super().single_vote(pair, ranking, p)
         next_wins = winner_id == pair[1]
         perform_vote(comparisons.current_annotator, next_wins)
         return loser_id, winner_id
 
     def rank(self):
         comparisons: CrowdBTPairings = self.comparisons
-        self.ranking = list(map(lambda i: i.id, sorted(comparisons.items, key=lambda i: i.mu)))
+        self.ranking = np.argsort(comparisons.items.mu, kind="stable").tolist()
         return self.ranking
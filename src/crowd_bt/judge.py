@@ -1,28 +1,26 @@
-from numpy.random import choice, random, shuffle
+import numpy as np
+from numpy.random import Generator
 
 from src.crowd_bt import crowd_bt
-from src.crowd_bt.models import Annotator, Item
+from src.crowd_bt.models import Annotator, Item, Items
 
 
-def maybe_init_annotator(annotator: Annotator, items: list[Item]):
+def maybe_init_annotator(annotator: Annotator, items: Items, rng: Generator):
     if annotator.next is None and annotator.prev is None:
-        prev, next = choice(items, 2)
+        prev, next = (items[i] for i in rng.choice(len(items), 2))
         annotator.prev = prev
         annotator.next = next
 
 
-def choose_next(annotator: Annotator, items: list[Item]):
-    shuffle(items)  # useful for argmax case as well in the case of ties
-
-    if random() < crowd_bt.EPSILON:
-        return items[0]
+def choose_next(annotator: Annotator, items: Items, rng: Generator):
+    if rng.random() < crowd_bt.EPSILON:
+        return items[rng.integers(len(items))]
     else:
-        return crowd_bt.argmax(
-            lambda i: crowd_bt.expected_information_gain(
-                annotator.alpha, annotator.beta, annotator.prev.mu, annotator.prev.sigma_sq, i.mu, i.sigma_sq
-            ),
-            items,
+        # Expected information gain of every item at once, ties broken at random
+        gains = crowd_bt.expected_information_gain(
+            annotator.alpha, annotator.beta, annotator.prev.mu, annotator.prev.sigma_sq, items.mu, items.sigma_sq
         )
+        return items[rng.choice(np.flatnonzero(gains == np.nanmax(gains)))]
 
 
 def perform_vote(annotator: Annotator, next_won: bool):
@@ -32,6 +30,10 @@ def perform_vote(annotator: Annotator, next_won: bool):
     else:
         winner = annotator.prev
         loser = annotator.next
+    apply_vote(annotator, winner, loser)
+
+
+def apply_vote(annotator: Annotator, winner: Item, loser: Item):
     u_alpha, u_beta, u_winner_mu, u_winner_sigma_sq, u_loser_mu, u_loser_sigma_sq = crowd_bt.update(
         annotator.alpha, annotator.beta, winner.mu, winner.sigma_sq, loser.mu, loser.sigma_sq
     )
@@ -1,20 +1,133 @@
+import numpy as np
+
 from src.crowd_bt import crowd_bt
 
+# prev / next index of an annotator who has not seen any item yet
+NO_ITEM = -1
 
-class Annotator:
-    def __init__(self) -> None:
-        self.alpha = crowd_bt.ALPHA_PRIOR
-        self.beta = crowd_bt.BETA_PRIOR
-        self.prev: Item = None
-        self.next: Item = None
-
-    def update_next(self, new_next):
-        self.prev = self.next
-        self.next = new_next
+
+class Items:
+    """
+    Posteriors of N items stored as a struct of arrays, so that they can be scored all at once
+
+    Indexing returns an Item view on one entry of the arrays
+    """
+
+    def __init__(self, N) -> None:
+        self.mu = np.full(N, crowd_bt.MU_PRIOR)
+        self.sigma_sq = np.full(N, crowd_bt.SIGMA_SQ_PRIOR)
+
+    def __len__(self):
+        return len(self.mu)
+
+    def __getitem__(self, id) -> "Item":
+        return Item(int(id), self)
+
+    def __iter__(self):
+        return (Item(id, self) for id in range(len(self)))
 
 
 class Item:
-    def __init__(self, id) -> None:
+    """View on the posterior of one item in an Items container"""
+
+    __slots__ = ("id", "items")
+
+    def __init__(self, id, items: Items) -> None:
         self.id = id
-        self.mu = crowd_bt.MU_PRIOR
-        self.sigma_sq = crowd_bt.SIGMA_SQ_PRIOR
+        self.items = items
+
+    def __eq__(self, other):
+        return isinstance(other, Item) and self.id == other.id and self.items is other.items
+
+    def __hash__(self):
+        return hash(self.id)
+
+    @property
+    def mu(self):
+        return self.items.mu[self.id]
+
+    @mu.setter
+    def mu(self, value):
+        self.items.mu[self.id] = value
+
+    @property
+    def sigma_sq(self):
+        return self.items.sigma_sq[self.id]
+
+    @sigma_sq.setter
+    def sigma_sq(self, value):
+        self.items.sigma_sq[self.id] = value
+
+
+class Annotators:
+    """
+    Registry of `count` annotators judging `items`, stored as a struct of arrays
+
+    The last two items shown to each annotator are kept as indices in `prev` and `next`, NO_ITEM before the first ones.
+    Indexing returns an Annotator view on one entry of the arrays.
+    """
+
+    def __init__(self, count, items: Items) -> None:
+        self.items = items
+        self.alpha = np.full(count, crowd_bt.ALPHA_PRIOR)
+        self.beta = np.full(count, crowd_bt.BETA_PRIOR)
+        self.prev = np.full(count, NO_ITEM, dtype=np.int32)
+        self.next = np.full(count, NO_ITEM, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.alpha)
+
+    def __getitem__(self, id) -> "Annotator":
+        return Annotator(int(id), self)
+
+    def __iter__(self):
+        return (Annotator(id, self) for id in range(len(self)))
+
+
+class Annotator:
+    """View on one annotator of an Annotators registry, prev and next read and write Item views"""
+
+    __slots__ = ("id", "annotators")
+
+    def __init__(self, id, annotators: Annotators) -> None:
+        self.id = id
+        self.annotators = annotators
+
+    def _item(self, index) -> Item:
+        return None if index == NO_ITEM else self.annotators.items[index]
+
+    @property
+    def alpha(self):
+        return self.annotators.alpha[self.id]
+
+    @alpha.setter
+    def alpha(self, value):
+        self.annotators.alpha[self.id] = value
+
+    @property
+    def beta(self):
+        return self.annotators.beta[self.id]
+
+    @beta.setter
+    def beta(self, value):
+        self.annotators.beta[self.id] = value
+
+    @property
+    def prev(self) -> Item:
+        return self._item(self.annotators.prev[self.id])
+
+    @prev.setter
+    def prev(self, item: Item):
+        self.annotators.prev[self.id] = NO_ITEM if item is None else item.id
+
+    @property
+    def next(self) -> Item:
+        return self._item(self.annotators.next[self.id])
+
+    @next.setter
+    def next(self, item: Item):
+        self.annotators.next[self.id] = NO_ITEM if item is None else item.id
+
+    def update_next(self, new_next: Item):
+        self.annotators.prev[self.id] = self.annotators.next[self.id]
+        self.next = new_next
@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import numpy as np
+
+from src.crowd_bt.crowd_bt import CrowdBTPairings
+from src.crowd_bt.judge import apply_vote, choose_next, maybe_init_annotator
+from src.utilities import *
+
+
+class JudgingSession:
+    """
+    Gavel-style judging event where many judges request pairs and send their votes concurrently
+
+    Every judge loops on: request a pair, think for a random (exponential) time, vote. Votes come back out of order and
+    are queued, then folded into the posteriors batch_size at a time in a worker thread. The posteriors are guarded by
+    a lock, so pair requests wait for the batch being applied and never read a half-updated state.
+    """
+
+    def __init__(self, N=500, judges=100, budget=5000, p=0.9, think_time=0.01, batch_size=16, rng=None) -> None:
+        """
+        judges: number of concurrent judges
+        budget: total number of votes
+        think_time: mean time in seconds a judge takes to vote
+        """
+        self.N = N
+        self.rng = np.random.default_rng(rng)
+        ranking_rng, comparisons_rng, oracle_rng, self.think_rng = spawn_generators(rng, 4)
+
+        self.comparisons = CrowdBTPairings(N, rng=comparisons_rng, annotators=judges)
+        self.true_ranking = random_list(N, ranking_rng)
+        self.oracle = Oracle(self.true_ranking, p, rng=oracle_rng)
+        self.budget = budget
+        self.think_time = think_time
+        self.batch_size = batch_size
+
+        self.latencies = []
+        self.votes = 0
+        self.batches = 0
+        self._pending = []
+        self._lock = asyncio.Lock()
+
+    async def request_pair(self, annotator_id) -> tuple[int, int]:
+        """Next pair (prev, next) shown to a judge"""
+        async with self._lock:
+            annotator = self.comparisons.annotators[annotator_id]
+            items = self.comparisons.items
+            maybe_init_annotator(annotator, items, self.comparisons.rng)
+            annotator.update_next(choose_next(annotator, items, self.comparisons.rng))
+            return annotator.prev.id, annotator.next.id
+
+    async def submit_vote(self, annotator_id, winner, loser):
+        self._pending.append((annotator_id, winner, loser))
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        """Applies the pending votes"""
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if batch:
+                await asyncio.to_thread(self._apply, batch)
+
+    def _apply(self, batch):
+        annotators, items = self.comparisons.annotators, self.comparisons.items
+        for annotator_id, winner, loser in batch:
+            apply_vote(annotators[annotator_id], items[winner], items[loser])
+
+        _, winners, losers = zip(*batch)
+        self.comparisons.record_votes(winners, losers)
+        self.votes += len(batch)
+        self.batches += 1
+
+    async def judge(self, annotator_id):
+        while self.budget > 0:
+            self.budget -= 1
+
+            start = time.perf_counter()
+            pair = await self.request_pair(annotator_id)
+            self.latencies.append(time.perf_counter() - start)
+
+            await asyncio.sleep(self.think_rng.exponential(self.think_time))
+            (loser, winner) = self.oracle.vote(pair)
+            await self.submit_vote(annotator_id, winner, loser)
+
+    async def run(self) -> dict:
+        """Runs the session until the budget is exhausted and returns its report"""
+        start = time.perf_counter()
+        await asyncio.gather(*(self.judge(a) for a in range(len(self.comparisons.annotators))))
+        await self.flush()
+        return self.report(time.perf_counter() - start)
+
+    def report(self, seconds) -> dict:
+        """Request latency percentiles (in seconds), throughput and score of a finished session"""
+        p50, p90, p99 = np.percentile(self.latencies, [50, 90, 99]) if self.latencies else (0, 0, 0)
+        return {
+            "judges": len(self.comparisons.annotators),
+            "votes": self.votes,
+            "batches": self.batches,
+            "seconds": seconds,
+            "votes_per_second": self.votes / seconds if seconds > 0 else 0,
+            "latency": {"p50": float(p50), "p90": float(p90), "p99": float(p99), "max": max(self.latencies, default=0)},
+            "score": float(self.score()),
+        }
+
+    def rank(self) -> list[int]:
+        self.ranking = np.argsort(self.comparisons.items.mu, kind="stable").tolist()
+        return self.ranking
+
+    def score(self, func=top_10):
+        return func(self.true_ranking, self.rank())
+
+
+def simulate(**kwargs) -> dict:
+    """Runs a JudgingSession built from kwargs and returns its report"""
+    return asyncio.run(JudgingSession(**kwargs).run())
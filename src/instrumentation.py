@@ -0,0 +1,126 @@
+import functools
+import time
+import tracemalloc
+
+# Methods instrumented on a Vote, on its pairings and on the structures the pairings maintain
+VOTE_METHODS = ("start_vote", "next_comparison", "next_round", "single_vote", "batch_vote", "rank")
+PAIRINGS_METHODS = ("next_comparison", "next_round", "record_vote", "record_votes")
+STRUCTURE_METHODS = {
+    "votes": ("record", "record_many", "compact"),
+    "scc": ("add_edge", "largest", "components"),
+    "reachability": ("add_edge",),
+}
+
+
+class Profiler:
+    """
+    Cumulative wall time, call counts and optionally peak memory of instrumented methods, by phase
+
+    Instrumenting an object replaces some of its methods by timed wrappers on this instance only, so that objects built
+    without a profiler run the plain methods at no cost. Each phase reports its inclusive time (`seconds`) and its
+    time outside other instrumented calls (`self_seconds`), which sum to the instrumented time without double counting.
+
+    memory: also trace the peak memory allocated during each phase with tracemalloc (much slower)
+    """
+
+    def __init__(self, memory=False) -> None:
+        self.memory = memory
+        self.phases = {}
+        self._stack = []
+        self._started_tracing = memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        self._start = time.perf_counter()
+
+    def instrument(self, obj, methods):
+        """Wraps the methods of obj, each one timed as the phase "ClassName.method" """
+        for name in methods:
+            method = getattr(obj, name, None)
+            if callable(method):
+                setattr(obj, name, self._wrap(f"{type(obj).__name__}.{name}", method))
+
+        return obj
+
+    def instrument_vote(self, vote):
+        """Instruments a Vote, its pairings and the structures they maintain"""
+        self.instrument(vote, VOTE_METHODS)
+        self.instrument(vote.comparisons, PAIRINGS_METHODS)
+        for attribute, methods in STRUCTURE_METHODS.items():
+            if hasattr(vote.comparisons, attribute):
+                self.instrument(getattr(vote.comparisons, attribute), methods)
+
+        return vote
+
+    def _wrap(self, phase, method):
+        stats = self.phases.setdefault(phase, {"calls": 0, "seconds": 0.0, "self_seconds": 0.0, "peak_bytes": 0})
+        stack = self._stack
+        memory = self.memory
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            # Frame: [time spent in instrumented children, memory at entry, peak memory so far]
+            if memory:
+                current, peak = tracemalloc.get_traced_memory()
+                if stack:
+                    stack[-1][2] = max(stack[-1][2], peak)
+                tracemalloc.reset_peak()
+                stack.append([0.0, current, current])
+            else:
+                stack.append([0.0, 0, 0])
+
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                children, baseline, peak = stack.pop()
+                stats["calls"] += 1
+                stats["seconds"] += elapsed
+                stats["self_seconds"] += elapsed - children
+
+                if memory:
+                    peak = max(peak, tracemalloc.get_traced_memory()[1])
+                    stats["peak_bytes"] = max(stats["peak_bytes"], peak - baseline)
+                    tracemalloc.reset_peak()
+                if stack:
+                    stack[-1][0] += elapsed
+                    stack[-1][2] = max(stack[-1][2], peak)
+
+        return wrapper
+
+    def stop(self):
+        """Stops tracing the memory, if this profiler started it"""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self) -> dict:
+        """
+        {"seconds": wall time since the profiler was created, "phases": {phase: stats}}
+
+        The `share` of a phase is its self time over the wall time
+        """
+        seconds = time.perf_counter() - self._start
+        return _with_shares({"seconds": seconds, "phases": {phase: dict(stats) for phase, stats in self.phases.items()}})
+
+
+def _with_shares(report: dict) -> dict:
+    for stats in report["phases"].values():
+        stats["share"] = stats["self_seconds"] / report["seconds"] if report["seconds"] > 0 else 0
+
+    return report
+
+
+def aggregate(reports: list[dict]) -> dict:
+    """Sums the reports of several trials, with the largest peak memory of each phase"""
+    phases = {}
+    for report in reports:
+        for phase, stats in report["phases"].items():
+            total = phases.setdefault(phase, {"calls": 0, "seconds": 0.0, "self_seconds": 0.0, "peak_bytes": 0})
+            for field in ("calls", "seconds", "self_seconds"):
+                total[field] += stats[field]
+            total["peak_bytes"] = max(total["peak_bytes"], stats["peak_bytes"])
+
+    return _with_shares(
+        {"trials": len(reports), "seconds": sum(report["seconds"] for report in reports), "phases": phases}
+    )
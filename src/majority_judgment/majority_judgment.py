@@ -1,44 +1,159 @@
-from random import sample
-from typing import Dict, Self
+from typing import Self
 
 import numpy as np
 
-from src.utilities import clip, random_list_from_gaussian_scores, top_10
+from src.utilities import top_10
+
+
+class GradeHistogram:
+    """
+    Grades of N items counted in `bins` equal bins between low and high, in an (N, bins) integer array
+
+    The memory does not depend on the number of votes. Adding a vote increments one count and refreshes the cached
+    median of its item only, so the medians stay available for a live leaderboard.
+    """
+
+    def __init__(self, N, bins=101, low=0, high=10) -> None:
+        self.bins = bins
+        self.low = low
+        self.high = high
+        self.counts = np.zeros((N, bins), dtype=np.int64)
+        self.median_bins = np.zeros(N, dtype=np.intp)
+
+    def bin(self, grades):
+        """Bin index of each grade, grades out of [low, high] go to the first or last bin"""
+        scaled = (np.asarray(grades) - self.low) * ((self.bins - 1) / (self.high - self.low))
+        return np.clip(np.rint(scaled), 0, self.bins - 1).astype(np.intp)
+
+    def grade(self, bins):
+        """Grade at the center of each bin"""
+        return self.low + np.asarray(bins) * ((self.high - self.low) / (self.bins - 1))
+
+    def add(self, item, grade):
+        self.counts[item, self.bin(grade)] += 1
+        self.median_bins[item] = lower_median_bins(self.counts[item])
+
+    def add_many(self, items, grades):
+        items = np.asarray(items)
+        flat = (items * self.bins + self.bin(grades)).ravel()
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+
+        touched = np.unique(items)
+        self.median_bins[touched] = lower_median_bins(self.counts[touched])
+
+    def medians(self):
+        """Lower median grade of every item (the lowest grade for items without votes)"""
+        return self.grade(self.median_bins)
+
+    def ranking(self) -> list[int]:
+        return majority_ranking(self.counts, self.median_bins)
+
+
+def lower_median_bins(counts):
+    """Bin of the lower median of each row of a histogram array, found by cumulative count"""
+    cumulative = np.cumsum(counts, axis=-1)
+    half = (cumulative[..., -1:] + 1) // 2
+    return (cumulative < half).sum(axis=-1)
+
+
+def majority_ranking(counts, median_bins=None) -> list[int]:
+    """
+    Input: counts an (N, bins) histogram of the grades of N items
+
+    Output: the majority judgment ranking of the items, from worst to best
+
+    median_bins: the lower median bins of counts, when already known
+
+    Items are compared on their median grades. Tied items each lose one median grade and are compared again on their new
+    medians, until the tie is broken or they run out of grades (an item without grades left ranks below). Only the rows
+    still tied are refined at each step, and the successive medians are sorted at once with lexsort.
+    """
+    counts = np.array(counts)
+    N = len(counts)
+    keys = []
+    active = np.arange(N)
+    group = np.zeros(N, dtype=np.intp)
+
+    while len(active) > 1:
+        rows = counts[active]
+        medians = lower_median_bins(rows) if keys or median_bins is None else np.asarray(median_bins)
+        has_grades = rows.sum(axis=1) > 0
+        key = np.full(N, -1)
+        key[active] = np.where(has_grades, medians, -1)
+        keys.append(key)
+
+        # Remove the median grade of the rows, then keep refining the ones tied with another row
+        counts[active[has_grades], medians[has_grades]] -= 1
+        _, group = np.unique(group * (counts.shape[1] + 1) + key[active] + 1, return_inverse=True)
+        tied = (np.bincount(group)[group] > 1) & has_grades
+        active, group = active[tied], group[tied]
+
+    if not keys:
+        return list(range(N))
+
+    # lexsort sorts on its last key first
+    return np.lexsort(keys[::-1]).tolist()
+
+
+def true_scores(shape, m=5, s=2, rng=None):
+    """Gaussian true scores clipped to [0, 10]"""
+    return np.clip(np.random.default_rng(rng).normal(m, s, size=shape), 0, 10)
+
+
+def noisy_grades(scores, items, spread, rng=None):
+    """Grades of the items drawn around their true scores, clipped to [0, 10]"""
+    return np.clip(np.random.default_rng(rng).normal(np.take_along_axis(scores, items, axis=-1), spread), 0, 10)
 
 
 class MajorityJudgement:
-    def __init__(self, N, budget, spread=1) -> None:
+    def __init__(self, N, budget, spread=1, bins=101, rng=None) -> None:
+        """bins: number of grade bins between 0 and 10"""
         self.N = N
         self.budget = budget
-        self.ranked_entries = random_list_from_gaussian_scores(N, m=5, s=2)
+        self.rng = np.random.default_rng(rng)
+        self.true_scores = true_scores(N, rng=self.rng)
+        self.true_ranking = np.argsort(self.true_scores, kind="stable").tolist()
         self.spread = spread
+        self.grades = GradeHistogram(N, bins, low=0, high=10)
 
         self.start_vote()
 
     def start_vote(self) -> Self:
-        while self.budget > 0:
-            item = sample(self.ranked_entries, 1)[0]
+        # The items and grades of the whole budget are drawn at once
+        items = self.rng.integers(self.N, size=self.budget)
+        self.grades.add_many(items, noisy_grades(self.true_scores, items, self.spread, self.rng))
+        self.budget = 0
 
-            self.single_vote(item)
-            self.budget -= 1
+        return self
 
-            if self.budget == 0:
-                break
+    def single_vote(self, item: int):
+        self.grades.add(item, noisy_grades(self.true_scores, np.array([item]), self.spread, self.rng)[0])
 
-        return self
+    def rank(self) -> list[int]:
+        return self.grades.ranking()
 
-    def single_vote(self, item: dict):
-        score = clip(np.random.normal(item["score"], self.spread), minimum=0, maximum=10)
+    def score(self):
+        return top_10(self.true_ranking, self.rank())
 
-        if "votes" not in item:
-            item["votes"] = []
 
-        item["votes"].append(score)
+def majority_judgment_trials(trials, N, budget, spread=1, bins=101, rng=None) -> np.ndarray:
+    """
+    Scores of `trials` independent MajorityJudgement runs, simulated together
 
-    def rank(self) -> list[int]:
-        return sorted(self.ranked_entries, key=lambda x: np.median(x["votes"]))
+    The true scores, voted items and grades of every trial are drawn as (trials, N) and (trials, budget) arrays, and
+    binned into a single (trials, N, bins) histogram
+    """
+    rng = np.random.default_rng(rng)
+    scores = true_scores((trials, N), rng=rng)
+    items = rng.integers(N, size=(trials, budget))
+    grades = noisy_grades(scores, items, spread, rng)
 
-    def score(self):
-        true_ranking = list(map(lambda x: x["index"], self.ranked_entries))
-        final_ranking = list(map(lambda x: x["index"], self.rank()))
-        return top_10(true_ranking, final_ranking)
+    histogram = GradeHistogram(trials * N, bins, low=0, high=10)
+    histogram.add_many(items + N * np.arange(trials)[:, None], grades)
+    counts = histogram.counts.reshape(trials, N, bins)
+    median_bins = histogram.median_bins.reshape(trials, N)
+
+    true_rankings = np.argsort(scores, axis=1, kind="stable")
+    return np.array(
+        [top_10(true_rankings[t].tolist(), majority_ranking(counts[t], median_bins[t])) for t in range(trials)]
+    )
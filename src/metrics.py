@@ -0,0 +1,115 @@
+import numpy as np
+
+# Every metric compares one true ranking to a ranking (N,) or a batch of rankings (B, N), all in increasing order, and
+# returns a float or a (B,) array of distances
+
+
+def _batch(rankings):
+    rankings = np.asarray(rankings)
+    return np.atleast_2d(rankings), rankings.ndim == 1
+
+
+def _unbatch(distances, single):
+    return float(distances[0]) if single else distances
+
+
+def inverse_permutations(rankings) -> np.ndarray:
+    """Position of every item in each ranking (along the last axis)"""
+    rankings = np.asarray(rankings)
+    positions = np.empty_like(rankings)
+    np.put_along_axis(positions, rankings, np.broadcast_to(np.arange(rankings.shape[-1]), rankings.shape), axis=-1)
+    return positions
+
+
+def count_inversions(sequences) -> np.ndarray:
+    """
+    Number of inversions of each permutation of range(N) in a (B, N) array, by bottom-up merge sort
+
+    Each level sorts the blocks made of two sorted runs with a stable sort, which merges the runs in linear time, so the
+    whole count takes O(N log N) per row. An element of a right run is inverted with every element of its left run
+    that ends up after it.
+    """
+    sequences, _ = _batch(sequences)
+    B, N = sequences.shape
+    size = 1 << max(N - 1, 0).bit_length()
+    # Increasing padding above every value adds no inversion
+    blocks = np.concatenate([sequences, np.broadcast_to(np.arange(N, size), (B, size - N))], axis=1)
+
+    inversions = np.zeros(B, dtype=np.int64)
+    width = 1
+    while width < size:
+        blocks = blocks.reshape(B, size // (2 * width), 2 * width)
+        order = np.argsort(blocks, axis=-1, kind="stable")
+        merged = inverse_permutations(order)
+        # Left elements before each right element: merged position minus position in the right run
+        left_before = merged[..., width:] - np.arange(width)
+        inversions += (width - left_before).sum(axis=(1, 2))
+        blocks = np.take_along_axis(blocks, order, axis=-1).reshape(B, size)
+        width *= 2
+
+    return inversions
+
+
+def kendall_tau_distance(truth, rankings):
+    """Normalized Kendall tau distance: the fraction of pairs ordered differently, in O(N log N)"""
+    rankings, single = _batch(rankings)
+    N = rankings.shape[1]
+    # Positions in each ranking of the items taken in the true order
+    sequences = np.take_along_axis(inverse_permutations(rankings), np.asarray(truth)[None, :], axis=1)
+    pairs = N * (N - 1) / 2
+    return _unbatch(count_inversions(sequences) / pairs if pairs else np.zeros(len(rankings)), single)
+
+
+def weighted_distances(truth, rankings):
+    """
+    Euclidean distance between the positions of the items in the true ranking and in each ranking, the item i weighted
+    by exp(-(N - 1 - i)) with weights summing to N
+    """
+    rankings, single = _batch(rankings)
+    N = rankings.shape[1]
+    normalize = N / ((1 - np.exp(-N)) / (1 - np.exp(-1)))
+    weights = normalize * np.exp(-(N - 1 - np.arange(N)))
+
+    deltas = inverse_permutations(rankings) - inverse_permutations(truth)
+    return _unbatch(np.sqrt((deltas**2 * weights).sum(axis=1)), single)
+
+
+def top_k_distance(truth, rankings, k=None):
+    """
+    1 - the fraction of the k best items of the truth found in the k best items of each ranking
+
+    truth may also be a (B, N) array holding the true ranking of each ranking
+    k defaults to 10% of the items, which gives utilities.top_10
+    """
+    rankings, single = _batch(rankings)
+    N = rankings.shape[1]
+    k = N // 10 if k is None else k
+
+    truth = np.atleast_2d(truth)
+    in_top = np.zeros(truth.shape, dtype=bool)
+    np.put_along_axis(in_top, truth[:, N - k :], True, axis=1)
+    overlap = np.take_along_axis(in_top, rankings[:, N - k :], axis=1).sum(axis=1)
+    return _unbatch(1 - overlap / k, single)
+
+
+def rbo_distance(truth, rankings, p=0.9, depth=None):
+    """
+    1 - extrapolated rank-biased overlap (Webber, Moffat and Zobel 2010) between the truth and each ranking
+
+    The overlap of the best d items of both rankings is weighted by p^(d-1), so the distance is top-weighted: p close to 1
+    looks deeper in the rankings. depth: number of best items compared, all of them by default
+    """
+    rankings, single = _batch(rankings)
+    B, N = rankings.shape
+    depth = N if depth is None else depth
+
+    # Depths from the best item: an item is in the d best of both rankings for d > the larger of its two depths
+    depths_truth = N - 1 - inverse_permutations(truth)
+    depths = np.maximum(N - 1 - inverse_permutations(rankings), depths_truth)
+    counts = np.bincount((depths + N * np.arange(B)[:, None]).ravel(), minlength=B * N).reshape(B, N)
+    overlaps = np.cumsum(counts, axis=1)[:, :depth]
+
+    d = np.arange(1, depth + 1)
+    agreements = overlaps / d
+    rbo = agreements[:, -1] * p**depth + (1 - p) * (agreements * p ** (d - 1)).sum(axis=1)
+    return _unbatch(1 - rbo, single)
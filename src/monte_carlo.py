@@ -0,0 +1,137 @@
+import numpy as np
+
+from src.metrics import inverse_permutations, top_k_distance
+from src.pairings import Random, RandomCycles
+from src.utilities import cycle_edge_array, random_cycles
+
+# Many independent trials of a non-adaptive pairing and ranker simulated together, the trials stacked on a first axis.
+# majority_judgment.majority_judgment_trials is the Majority Judgment counterpart of bradley_terry_trials.
+
+
+def random_schedules(trials, N, budget, comparisons_cls=Random, rematch=1, rng=None) -> np.ndarray:
+    """
+    Pairs voted on in each trial, as a (trials, budget, 2) array, drawn as by the rounds of comparisons_cls
+
+    Only the pairings that don't depend on the votes (Random and RandomCycles) can be drawn ahead of time
+    """
+    rng = np.random.default_rng(rng)
+    rounds = -(-budget // (N * rematch))
+
+    if comparisons_cls is Random:
+        a = rng.integers(N, size=(trials, rounds * N))
+        b = rng.integers(N - 1, size=(trials, rounds * N))
+        b[b >= a] += 1
+        pairs = np.stack([a, b], axis=-1)
+    elif comparisons_cls is RandomCycles:
+        cycles = random_cycles(trials * rounds, N, rng)
+        pairs = cycle_edge_array(cycles).reshape(trials, rounds * N, 2)
+    else:
+        raise ValueError(f"{comparisons_cls.__name__} pairings can't be drawn ahead of time")
+
+    # Every pair is voted on rematch times in a row
+    return np.repeat(pairs, rematch, axis=1)[:, :budget]
+
+
+def batched_votes(true_rankings, pairs, p=1, rng=None):
+    """
+    Oracle votes on the pairs of each trial, the pair (a, b) of trial t voted on against true_rankings[t]
+
+    Returns (losers, winners) as (trials, budget) arrays
+    """
+    rng = np.random.default_rng(rng)
+    positions = inverse_permutations(true_rankings)
+    position_a = np.take_along_axis(positions, pairs[..., 0], axis=1)
+    position_b = np.take_along_axis(positions, pairs[..., 1], axis=1)
+
+    # As Oracle.vote: b wins when the oracle is right and b is better, or wrong and a is better
+    b_wins = (position_a < position_b) == (rng.random(position_a.shape) < p)
+    losers = np.where(b_wins, pairs[..., 0], pairs[..., 1])
+    winners = np.where(b_wins, pairs[..., 1], pairs[..., 0])
+    return losers, winners
+
+
+def batched_bradley_terry(N, winners, losers, tol=1e-6, max_iterations=1000):
+    """
+    bradley_terry_mm on the votes (winners, losers) of every trial, as (trials, budget) arrays
+
+    The trials are stacked as one block diagonal problem on trials * N nodes, so each MM iteration of every trial is a
+    single gather and bincount over the pairs that met. A trial stops updating when it converges, and its pairs are
+    dropped from the next iterations.
+
+    Returns (scores, iterations) as a (trials, N) and a (trials,) array
+    """
+    trials = len(winners)
+    nodes = trials * N
+    offsets = N * np.arange(trials)[:, None]
+    winners = (winners + offsets).ravel()
+    losers = (losers + offsets).ravel()
+
+    wins = np.bincount(winners, minlength=nodes).astype(float)
+    # Games between each pair that met, every pair (i, j) once with i < j
+    pairs, games = np.unique(np.minimum(winners, losers) * nodes + np.maximum(winners, losers), return_counts=True)
+    rows, cols = np.divmod(pairs, nodes)
+    games = games.astype(float)
+    trial_of = np.repeat(np.arange(trials), N)
+
+    scores = np.full(nodes, 1 / N)
+    iterations = np.zeros(trials, dtype=int)
+    active = np.ones(trials, dtype=bool)
+
+    while active.any() and iterations.max() < max_iterations:
+        pair_sums = scores[rows] + scores[cols]
+        # Pairs of zero scores don't contribute to the denominator, vanishing ones overflow to a zero score
+        pair_sums[pair_sums == 0] = np.inf
+        with np.errstate(over="ignore"):
+            ratios = games / pair_sums
+        # Both players of a pair share its ratio
+        D = np.bincount(rows, weights=ratios, minlength=nodes) + np.bincount(cols, weights=ratios, minlength=nodes)
+
+        new_scores = np.divide(wins, D, out=np.zeros(nodes), where=D != 0)
+        totals = np.bincount(trial_of, weights=new_scores, minlength=trials)[trial_of]
+        new_scores = np.divide(new_scores, totals, out=np.zeros(nodes), where=totals != 0)
+        change = np.bincount(trial_of, weights=np.abs(new_scores - scores), minlength=trials)
+
+        updated = active[trial_of]
+        scores[updated] = new_scores[updated]
+        iterations += active
+
+        converged = active & (change <= tol)
+        if converged.any():
+            active &= ~converged
+            # The pairs of the converged trials are dropped from the next iterations
+            remaining = active[trial_of[rows]]
+            rows, cols, games = rows[remaining], cols[remaining], games[remaining]
+
+    return scores.reshape(trials, N), iterations
+
+
+def trials_per_chunk(N, budget, memory=2**28):
+    """Number of trials simulated together so that their arrays fit in about `memory` bytes"""
+    # Schedules, votes and the games in both directions are a few int64 arrays of budget entries, plus the (N,) states
+    bytes_per_trial = 8 * (16 * budget + 8 * N)
+    return max(1, memory // bytes_per_trial)
+
+
+def bradley_terry_trials(
+    trials, N=500, budget=15000, comparisons_cls=Random, rematch=1, p=0.9, memory=2**28, rng=None
+) -> np.ndarray:
+    """
+    top_10 scores of `trials` independent BradleyTerry runs, simulated together
+
+    memory: approximate size in bytes of the arrays of the trials simulated together, bigger runs go by chunks
+    """
+    rng = np.random.default_rng(rng)
+    chunk = trials_per_chunk(N, budget, memory)
+    scores = []
+
+    for start in range(0, trials, chunk):
+        T = min(chunk, trials - start)
+        true_rankings = random_cycles(T, N, rng)
+        pairs = random_schedules(T, N, budget, comparisons_cls, rematch, rng)
+        losers, winners = batched_votes(true_rankings, pairs, p, rng)
+
+        bt_scores, _ = batched_bradley_terry(N, winners, losers)
+        rankings = np.argsort(bt_scores, axis=1, kind="stable")
+        scores.append(top_k_distance(true_rankings, rankings))
+
+    return np.concatenate(scores)
@@ -1,20 +1,63 @@
 import networkx as nx
+import numpy as np
+from scipy import sparse
 
 from src.utilities import *
 from src.votes import *
 
 
+def pagerank_scores(A, alpha=0.85, tol=1e-6, max_iterations=100, scores=None):
+    """
+    PageRank by power iteration on a sparse adjacency matrix A, with (i,j) the weight of the edge i->j
+
+    Same conventions as nx.pagerank: the rank of dangling nodes (no outgoing edge) is spread uniformly, and iterations
+    stop when the L1 change is below N * tol. scores is an optional previous PageRank vector to warm start from.
+
+    Returns (scores, iterations), the last iterate is returned if max_iterations is reached
+    """
+    A = sparse.csr_array(A, dtype=float)
+    N = A.shape[0]
+
+    out_weights = A.sum(axis=1)
+    dangling = out_weights == 0
+    inverse_weights = np.divide(1, out_weights, out=np.zeros(N), where=~dangling)
+    # Transposed transition matrix, so that an iteration is a CSR matrix-vector product
+    T = (sparse.diags_array(inverse_weights) @ A).T.tocsr()
+
+    if scores is None or len(scores) != N:
+        x = np.full(N, 1 / N)
+    else:
+        x = np.array(scores, dtype=float)
+        x /= x.sum()
+
+    iterations = 0
+    while iterations < max_iterations:
+        last = x
+        x = alpha * (T @ x + last[dangling].sum() / N) + (1 - alpha) / N
+        iterations += 1
+
+        if np.abs(x - last).sum() < N * tol:
+            break
+
+    return x, iterations
+
+
+def ranking_from_pagerank(scores):
+    """
+    Returns the ranking in increasing order from PageRank scores: votes point from winner to loser, so the best entries
+    have the smallest PageRank
+    """
+    return np.argsort(-np.asarray(scores), kind="stable").tolist()
+
+
 def page_rank(G: nx.DiGraph):
     """
     Returns the ranked list of vertices of G in increasing order, according to page rank
     """
+    nodes = list(G)
+    scores, _ = pagerank_scores(nx.to_scipy_sparse_array(G, nodelist=nodes))
 
-    # Compute PageRank
-    pr = nx.pagerank(G)
-    # Sort entries with increasing scores
-    sorted_entries = sorted(list(pr.items()), key=lambda e: e[1], reverse=True)
-    # Return the sorted entries numbers
-    return list(map(lambda x: x[0], sorted_entries))
+    return [nodes[i] for i in ranking_from_pagerank(scores)]
 
 
 def initialize_graph(N: int):
@@ -23,7 +66,7 @@ def initialize_graph(N: int):
     return G
 
 
-def iteratedPageRank(ranking: list[int], vote_budget: int, reassess=1, p=0.9):
+def iteratedPageRank(ranking: list[int], vote_budget: int, reassess=1, p=0.9, rng=None):
     """
     ranking: the 'true' ranking
     vote_budget: how many votes to make
@@ -32,15 +75,19 @@ def iteratedPageRank(ranking: list[int], vote_budget: int, reassess=1, p=0.9):
     """
     N = len(ranking)
     G = initialize_graph(N)
+    rng = np.random.default_rng(rng)
+    oracle = Oracle(ranking, p, rng)
+    scores = None
 
     remaining_votes = vote_budget
     while remaining_votes > 0:
         if remaining_votes == vote_budget:
             # initial loop: vote on the edges of a random cycle
-            cycle = random_list(N)
+            cycle = random_list(N, rng)
         else:
-            # iteration: make a new independent cycle from the page rank on G
-            cycle = page_rank(G)
+            # iteration: make a new independent cycle from the page rank on G, warm started from the previous one
+            scores, _ = pagerank_scores(nx.to_scipy_sparse_array(G, nodelist=range(N)), scores=scores)
+            cycle = ranking_from_pagerank(scores)
 
         edges = cycle_edges(cycle)
 
@@ -48,7 +95,7 @@ def iteratedPageRank(ranking: list[int], vote_budget: int, reassess=1, p=0.9):
             i = reassess
             while i > 0:
                 i -= 1
-                arrow = vote(pair, ranking, p)
+                arrow = oracle.vote(pair)
                 remaining_votes -= 1
                 G.add_edges_from([arrow])
 
@@ -62,23 +109,38 @@ def iteratedPageRank(ranking: list[int], vote_budget: int, reassess=1, p=0.9):
 
 
 class PageRank(Vote):
+    scores = None
+
     def rank(self):
-        return page_rank(self.comparisons.graph)
+        # Warm start from the previous ranking, only a few votes changed since then
+        self.scores, self.iterations = pagerank_scores(self.comparisons.votes.sparse, scores=self.scores)
+        return ranking_from_pagerank(self.scores)
 
 
 class IteratedPageRank(PageRank):
-    def next_comparison(self):
+    def next_cycle(self) -> list[int]:
         if not hasattr(self, "_edges"):
-            new_cycle = random_list(self.N)
-        elif self._edges == None:
-            new_cycle = page_rank(self.comparisons.graph)
+            # initial loop: vote on the edges of a random cycle
+            return random_list(self.N, self.rng)
+
+        # iteration: make a new independent cycle from the current page rank
+        return self.rank()
 
-        if "new_cycle" in locals():
-            edges = cycle_edges(new_cycle)
-            self._edges = edges.__iter__()
+    def next_comparison(self):
+        if getattr(self, "_edges", None) == None:
+            self._edges = cycle_edges(self.next_cycle()).__iter__()
 
         try:
             return self._edges.__next__()
         except StopIteration:
             self._edges = None
             return self.next_comparison()
+
+    def next_round(self):
+        # The rest of the current cycle, or a new one
+        edges = list(getattr(self, "_edges", None) or [])
+        # Drawn before _edges is set, the first cycle is random
+        edges = np.array(edges) if edges else cycle_edge_array(self.next_cycle())
+        self._edges = None
+
+        return edges
@@ -1,50 +1,80 @@
 from itertools import zip_longest
-from random import choice, sample, shuffle
 
 import networkx as nx
 import numpy as np
 
+from src.reachability import ReachabilityIndex
+from src.scc import IncrementalSCC
 from src.utilities import *
+from src.vote_store import VoteStore
 
 
 class Pairings:
-    def __init__(self, N) -> None:
+    def __init__(self, N, rng=None) -> None:
         self.N = N
-        self.graph = nx.DiGraph()
-        self.graph.add_nodes_from(range(N))
-        self.matrix = np.zeros((N, N))
+        self.rng = np.random.default_rng(rng)
+        self.votes = VoteStore(N)
+
+    @property
+    def graph(self) -> nx.DiGraph:
+        return self.votes.graph
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self.votes.matrix
 
     def next_comparison(self) -> tuple[int, int]:
         pass
 
+    def next_round(self) -> np.ndarray | None:
+        """
+        Pairings knowing several comparisons in advance can return them at once as an (M, 2) array
+
+        None means that comparisons must be asked one at a time with next_comparison
+        """
+        return None
+
     def record_vote(self, winner, loser):
-        # coefficient i,j is the number of times i beats j
-        self.matrix[winner][loser] += 1
+        # coefficient i,j of the matrix is the number of times i beats j
+        self.votes.record(winner, loser)
 
-        if (winner, loser) in self.graph.edges:
-            self.graph.edges[(winner, loser)]["weight"] += 1
-        else:
-            self.graph.add_edge(winner, loser, weight=1)
+    def record_votes(self, winners, losers):
+        """Records a batch of votes, subclasses tracking the graph must hook into this function too"""
+        self.votes.record_many(winners, losers)
 
 
 class Random(Pairings):
-    def __init__(self, N) -> None:
-        super().__init__(N)
+    def __init__(self, N, rng=None) -> None:
+        super().__init__(N, rng)
 
     def next_comparison(self):
-        return tuple(sample(range(self.N), 2))
+        a, b = self.rng.integers(self.N), self.rng.integers(self.N - 1)
+        return (int(a), int(b + (b >= a)))
+
+    def next_round(self):
+        # N independent pairs of distinct entries
+        a = self.rng.integers(self.N, size=self.N)
+        b = self.rng.integers(self.N - 1, size=self.N)
+        b[b >= a] += 1
+        return np.stack([a, b], axis=1)
 
 
-class RandomCycles(Pairings):
-    def __init__(self, N) -> None:
-        super().__init__(N)
+class CyclePairings(Pairings):
+    """
+    Pairings comparing the adjacent entries of successive cycles through all the entries
+    """
+
+    def __init__(self, N, rng=None) -> None:
+        super().__init__(N, rng)
         self._edges = None
 
+    def make_cycle(self) -> list[int]:
+        # Subclasses must implement this function
+        pass
+
     def next_comparison(self):
-        if not self._edges:
-            cycle = random_list(self.N)
-            edges = cycle_edges(cycle)
-            self._edges = edges.__iter__()
+        if self._edges == None:
+            self._edges = cycle_edges(self.make_cycle()).__iter__()
 
         try:
             return self._edges.__next__()
@@ -52,15 +82,64 @@ class RandomCycles(Pairings):
             self._edges = None
             return self.next_comparison()
 
+    def next_round(self):
+        # The rest of the current cycle, or a new one
+        edges = [] if self._edges == None else list(self._edges)
+        self._edges = None
+
+        return np.array(edges) if edges else cycle_edge_array(self.make_cycle())
+
+
+class RandomCycles(CyclePairings):
+    # Number of cycles drawn at once
+    block_size = 64
+
+    def __init__(self, N, rng=None) -> None:
+        super().__init__(N, rng)
+        self._cycles = iter(())
+
+    def make_cycle(self) -> list[int]:
+        cycle = next(self._cycles, None)
+        if cycle is None:
+            self._cycles = iter(random_cycles(self.block_size, self.N, self.rng))
+            cycle = next(self._cycles)
 
-class CCBiggest(Pairings):
+        return cycle
+
+
+class ComponentPairings(Pairings):
+    """
+    Pairings keeping track of the strongly connected components of the vote graph as votes are recorded
+    """
+
+    def __init__(self, N, rng=None) -> None:
+        super().__init__(N, rng)
+        self.scc = IncrementalSCC(N)
+
+    def record_vote(self, winner, loser):
+        super().record_vote(winner, loser)
+        self.scc.add_edge(winner, loser)
+
+    def record_votes(self, winners, losers):
+        super().record_votes(winners, losers)
+        for winner, loser in zip(np.asarray(winners).tolist(), np.asarray(losers).tolist()):
+            self.scc.add_edge(winner, loser)
+
+    def shuffled_components(self) -> list[list[int]]:
+        """Strongly connected components, ordered in decreasing sizes, items shuffled"""
+        components = sorted(self.scc.components(), key=lambda comp: len(comp), reverse=True)
+        [self.rng.shuffle(comp) for comp in components]
+        return components
+
+
+class CCBiggest(ComponentPairings):
     """
     This pairing relies on the computation of the strongly connected components.
     The biggest components are stitched together
     """
 
-    def __init__(self, N) -> None:
-        super().__init__(N)
+    def __init__(self, N, rng=None) -> None:
+        super().__init__(N, rng)
         self._components = []
         self._cycle = []
         self._last_node_component_index = 0
@@ -69,9 +148,7 @@ class CCBiggest(Pairings):
     def next_comparison(self):
         if len(self._cycle) == 0:
             # Strongly connected components, ordered in decreasing sizes, items shuffled
-            self._components = [list(c) for c in nx.strongly_connected_components(self.graph)]
-            self._components = sorted(self._components, key=lambda comp: len(comp), reverse=True)
-            [shuffle(comp) for comp in self._components]
+            self._components = self.shuffled_components()
             self._nb_components_memo.append(len(self._components))
 
             self._cycle.append(self._components[0].pop())
@@ -102,104 +179,128 @@ class CCBiggest(Pairings):
         return tuple(self._cycle[-2:])
 
 
-class CCZip(Pairings):
+class CCZip(ComponentPairings, CyclePairings):
     """
     This pairing relies on the computation of the strongly connected components
     They are zipped together
     """
 
-    def __init__(self, N) -> None:
-        super().__init__(N)
+    def __init__(self, N, rng=None) -> None:
+        super().__init__(N, rng)
         self._components = []
-        self._edges = None
         self._nb_components_memo = []
 
-    def next_comparison(self):
-        if not self._edges:
-            # Strongly connected components, ordered in decreasing sizes, items shuffled
-            self._components = [list(c) for c in nx.strongly_connected_components(self.graph)]
-            self._components = sorted(self._components, key=lambda comp: len(comp), reverse=True)
-            [shuffle(comp) for comp in self._components]
-            self._nb_components_memo.append(len(self._components))
-
-            # Create a cycle by cycling around the components
-            padded_rows = list(zip_longest(*self._components))
-            cycle = []
-            for row in padded_rows:
-                for node in row:
-                    if node != None:
-                        cycle.append(node)
+    def make_cycle(self) -> list[int]:
+        # Strongly connected components, ordered in decreasing sizes, items shuffled
+        self._components = self.shuffled_components()
+        self._nb_components_memo.append(len(self._components))
 
-            self._edges = cycle_edges(cycle).__iter__()
+        # Create a cycle by cycling around the components
+        padded_rows = list(zip_longest(*self._components))
+        cycle = []
+        for row in padded_rows:
+            for node in row:
+                if node != None:
+                    cycle.append(node)
 
-        try:
-            return self._edges.__next__()
-        except StopIteration:
-            self._edges = None
-            return self.next_comparison()
+        return cycle
 
 
-class Reachability(Pairings):
+class Reachability(CyclePairings):
     """
     This pairing increases the reachability of nodes
     """
 
-    def __init__(self, N) -> None:
-        super().__init__(N)
+    def __init__(self, N, rng=None) -> None:
+        super().__init__(N, rng)
         self._components = []
-        self._edges = None
 
-    def next_comparison(self):
-        if self._edges == None:
-            cycle = []
+    def make_cycle(self) -> list[int]:
+        cycle = []
+
+        current_node = int(self.rng.integers(self.N))
+        cycle.append(current_node)
+        while len(cycle) < self.N:
+            # Compute connectivity from current_node to nodes not in cycle
+            node_connectivity = [
+                (i, nx.algorithms.approximation.node_connectivity(self.graph, current_node, i))
+                for i in set(range(self.N)) - set(cycle)
+            ]
+            # Find the unvisited node with smallest connectivity from current_node
+            current_node = min(node_connectivity, key=lambda x: x[1])[0]
+            cycle.append(current_node)
+
+        return cycle
+
+
+class FastReachability(Reachability):
+    """
+    Faster variant of Reachability keeping the transitive closure of the vote graph as packed bitsets
+
+    The next node of the cycle is an unvisited node not reachable from the current node, preferably not reaching it
+    either, and among those one reaching the fewest nodes
+    """
+
+    def __init__(self, N, rng=None) -> None:
+        super().__init__(N, rng)
+        self.reachability = ReachabilityIndex(N)
 
-            current_node = choice(range(self.N))
+    def record_vote(self, winner, loser):
+        super().record_vote(winner, loser)
+        self.reachability.add_edge(winner, loser)
+
+    def record_votes(self, winners, losers):
+        super().record_votes(winners, losers)
+        for winner, loser in zip(np.asarray(winners).tolist(), np.asarray(losers).tolist()):
+            self.reachability.add_edge(winner, loser)
+
+    def make_cycle(self) -> list[int]:
+        reachability = self.reachability
+        # Lexicographic key (reachable from current, reaching current, number of nodes reached)
+        scale = self.N + 1
+        visited = np.zeros(self.N, dtype=bool)
+
+        current_node = int(self.rng.integers(self.N))
+        cycle = [current_node]
+        visited[current_node] = True
+        while len(cycle) < self.N:
+            key = (
+                reachability.reachable_from(current_node) * 2 * scale
+                + reachability.reaching(current_node) * scale
+                + reachability.counts
+            )
+            key[visited] = 4 * scale
+            current_node = int(self.rng.choice(np.flatnonzero(key == key.min())))
             cycle.append(current_node)
-            while len(cycle) < self.N:
-                # Compute connectivity from current_node to nodes not in cycle
-                node_connectivity = [
-                    (i, nx.algorithms.approximation.node_connectivity(self.graph, current_node, i))
-                    for i in set(range(self.N)) - set(cycle)
-                ]
-                # Find the unvisited node with smallest connectivity from current_node
-                current_node = min(node_connectivity, key=lambda x: x[1])[0]
-                cycle.append(current_node)
-
-            self._edges = cycle_edges(cycle).__iter__()
+            visited[current_node] = True
 
-        try:
-            return self._edges.__next__()
-        except StopIteration:
-            self._edges = None
-            return self.next_comparison()
+        return cycle
 
 
-class CCSlow(Pairings):
+class CCSlow(ComponentPairings):
     """
     This pairing optimizes the next comparison to get a strongly connected graph
 
     The resulting graph won't be regular
     """
 
-    def __init__(self, N) -> None:
-        super().__init__(N)
-        self._components = []
+    def __init__(self, N, rng=None) -> None:
+        super().__init__(N, rng)
         self._cycle = []
-        self._last_node_component_index = 0
         self._nb_components_memo = []
-        self.delegate = RandomCycles(self.N)
+        self.delegate = RandomCycles(self.N, self.rng)
+
+    def random_member(self, component):
+        members = self.scc.members(component)
+        return members[self.rng.integers(len(members))]
 
     def next_comparison(self):
-        # Strongly connected components, ordered in decreasing sizes, items shuffled
-        self._components = [list(c) for c in nx.strongly_connected_components(self.graph)]
-        self._components = sorted(self._components, key=lambda comp: len(comp), reverse=True)
-        [shuffle(comp) for comp in self._components]
+        scc = self.scc
 
         if len(self._cycle) == 0:
-            self._nb_components_memo.append(len(self._components))
+            self._nb_components_memo.append(len(scc))
 
-            self._cycle.append(self._components[0].pop())
-            self._last_node_component_index = 0
+            self._cycle.append(self.random_member(scc.largest()[0]))
 
         if len(self._cycle) == self.N:
             comparison = (self._cycle[0], self._cycle[-1])
@@ -207,18 +308,12 @@ class CCSlow(Pairings):
             return comparison
 
         # If there is only one component, make random cycles
-        if len(self._components) == 1:
+        if len(scc) == 1:
             return self.delegate.next_comparison()
 
-        # Pick a random node in a component not containing the last node
-        for i, comp in enumerate(self._components):
-            if i != self._last_node_component_index and len(comp) != 0:
-                next_node = self._components[i].pop()
-                self._cycle.append(next_node)
-                self._last_node_component_index = i
-                return tuple(self._cycle[-2:])
-
-        # If we couldn't find a node in a component not containing the last node
-        next_node = self._components[self._last_node_component_index].pop()
-        self._cycle.append(next_node)
+        # Pick a random node in the biggest component not containing the last node
+        biggest, second = scc.largest(2)
+        component = second if scc.component(self._cycle[-1]) == biggest else biggest
+
+        self._cycle.append(self.random_member(component))
         return tuple(self._cycle[-2:])
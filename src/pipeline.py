@@ -0,0 +1,127 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
+from typing import Self, Type
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+
+from src.pairings import Pairings, Random
+from src.shared_arrays import attach
+from src.utilities import top_10
+from src.votes import Vote
+
+
+class MatrixVotes:
+    """
+    Read-only stand-in for a VoteStore over a comparison matrix, used by the rankers running in another process
+    """
+
+    def __init__(self, matrix) -> None:
+        self.N = len(matrix)
+        self.matrix = matrix
+        self._csr = None
+        self._graph = None
+
+    @property
+    def sparse(self):
+        if self._csr is None:
+            self._csr = sparse.csr_array(self.matrix.astype(np.int32))
+        return self._csr
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            self._graph = nx.from_numpy_array(self.matrix, create_using=nx.DiGraph)
+        return self._graph
+
+
+def _score_shared(name, shape, vote_cls: Type[Vote], true_ranking, func):
+    """Scores a ranker over the comparison matrix held in a shared memory block"""
+    comparisons = Pairings(shape[0])
+    comparisons.votes = MatrixVotes(attach("shared_memory", name, shape, np.float64))
+    return float(vote_cls.from_comparisons(comparisons, true_ranking).score(func))
+
+
+class Pipeline:
+    """
+    Records the votes of a single simulation, then scores every registered ranker on them
+
+    The pairing and the oracle run once, so the rankers are compared on identical votes which are only paid for once.
+    Rankers choosing their own pairs (IteratedPageRank, CrowdBT) cannot be registered.
+    """
+
+    def __init__(self, N=500, budget=15000, comparisons_cls: Type[Pairings] = Random, rematch=1, p=0.9, rng=None):
+        self.recording = Vote(N, budget, comparisons_cls, rematch=rematch, p=p, rng=rng)
+        self.rankers: dict[str, Type[Vote]] = {}
+
+    def register(self, label, vote_cls: Type[Vote]) -> Self:
+        self.rankers[label] = vote_cls
+        return self
+
+    def ranker(self, label) -> Vote:
+        """The registered ranker over the recorded votes"""
+        return self.rankers[label].from_comparisons(self.recording.comparisons, self.recording.true_ranking)
+
+    def run(self, func=top_10, mode="serial", workers=None) -> dict[str, float]:
+        """
+        Returns the score of every registered ranker, by label
+
+        mode: "serial", "thread" to rank in a thread pool sharing the vote store, or "process" to rank in a process
+        pool where every worker reads the comparison matrix from one shared memory block
+        workers: size of the pool (None for the executor default)
+        """
+        assert mode in ("serial", "thread", "process"), f"Unknown mode {mode}"
+
+        labels = list(self.rankers)
+        if mode == "serial":
+            scores = [self.ranker(label).score(func) for label in labels]
+        elif mode == "thread":
+            # The views are materialized up front, the threads only read them
+            self.recording.comparisons.votes.sparse
+            self.recording.comparisons.votes.matrix
+            with ThreadPoolExecutor(workers) as executor:
+                scores = list(executor.map(lambda label: self.ranker(label).score(func), labels))
+        else:
+            matrix = self.recording.comparisons.votes.matrix
+            shm = shared_memory.SharedMemory(create=True, size=max(matrix.nbytes, 1))
+            try:
+                np.ndarray(matrix.shape, dtype=np.float64, buffer=shm.buf)[:] = matrix
+                with ProcessPoolExecutor(workers or os.cpu_count()) as executor:
+                    scores = list(
+                        executor.map(
+                            _score_shared,
+                            repeat(shm.name),
+                            repeat(matrix.shape),
+                            [self.rankers[label] for label in labels],
+                            repeat(self.recording.true_ranking),
+                            repeat(func),
+                        )
+                    )
+            finally:
+                shm.close()
+                shm.unlink()
+
+        return {label: float(score) for label, score in zip(labels, scores)}
+
+
+def compare(rankers: dict[str, Type[Vote]], trials=20, seed=None, func=top_10, mode="serial", workers=None, **config):
+    """
+    Scores every ranker on the same `trials` vote simulations
+
+    config: the arguments of Pipeline (N, budget, comparisons_cls, rematch, p)
+
+    Returns the {label: [scores]} layout of benchmark.run, scores in trial order
+    """
+    scores = {label: [] for label in rankers}
+    for trial_seed in np.random.SeedSequence(seed).spawn(trials):
+        pipeline = Pipeline(rng=trial_seed, **config)
+        for label, vote_cls in rankers.items():
+            pipeline.register(label, vote_cls)
+
+        for label, score in pipeline.run(func, mode, workers).items():
+            scores[label].append(score)
+
+    return scores
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+def popcount(rows: np.ndarray):
+    """Number of bits set in each row of a 2d array of packed bitsets"""
+    return np.unpackbits(np.ascontiguousarray(rows).view(np.uint8), axis=-1).sum(axis=-1)
+
+
+class ReachabilityIndex:
+    """
+    Transitive closure of a directed graph on N nodes whose edges are only ever added
+
+    Row u of `bits` is a packed bitset (N / 64 uint64 words) of the nodes reachable from u, every node reaching itself.
+    Adding an edge u -> v ORs the row of v into the rows of all the nodes reaching u.
+    """
+
+    def __init__(self, N) -> None:
+        self.N = N
+        nodes = np.arange(N)
+        self._words = nodes >> 6
+        self._shifts = (nodes & 63).astype(np.uint64)
+
+        self.bits = np.zeros((N, (N + 63) // 64), dtype=np.uint64)
+        self.bits[nodes, self._words] = np.uint64(1) << self._shifts
+        # Number of nodes reachable from each node
+        self.counts = np.ones(N, dtype=int)
+
+    def reaches(self, u, v) -> bool:
+        return bool((self.bits[u, self._words[v]] >> self._shifts[v]) & np.uint64(1))
+
+    def reachable_from(self, u) -> np.ndarray:
+        """Boolean mask of the nodes reachable from u"""
+        return ((self.bits[u, self._words] >> self._shifts) & np.uint64(1)).astype(bool)
+
+    def reaching(self, v) -> np.ndarray:
+        """Boolean mask of the nodes from which v is reachable"""
+        return ((self.bits[:, self._words[v]] >> self._shifts[v]) & np.uint64(1)).astype(bool)
+
+    def add_edge(self, u, v):
+        if self.reaches(u, v):
+            return
+
+        sources = self.reaching(u)
+        self.bits[sources] |= self.bits[v]
+        self.counts[sources] = popcount(self.bits[sources])
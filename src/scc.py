@@ -0,0 +1,115 @@
+import heapq
+
+
+class IncrementalSCC:
+    """
+    Strongly connected components of a directed graph on N nodes whose edges are only ever added
+
+    Components only merge as edges arrive. They are kept in a union-find structure, together with the condensation
+    graph (edges between components), so that the component of a node, the component sizes and the number of
+    components are available in near-constant time.
+
+    Adding an edge u -> v between two components searches the condensation from the component of v: if it reaches the
+    component of u, every component on a path between them is merged.
+    """
+
+    def __init__(self, N) -> None:
+        self.N = N
+        self.count = N
+        self._parent = list(range(N))
+        # Indexed by the root of each component
+        self._members = {i: [i] for i in range(N)}
+        self._out = {i: set() for i in range(N)}
+        self._in = {i: set() for i in range(N)}
+        # (-size, root) entries, outdated ones are dropped lazily
+        self._sizes = [(-1, i) for i in range(N)]
+
+    def __len__(self):
+        return self.count
+
+    def component(self, node) -> int:
+        """Representative node of the component containing node"""
+        parent = self._parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def members(self, node) -> list[int]:
+        """Nodes in the component containing node"""
+        return self._members[self.component(node)]
+
+    def size(self, node) -> int:
+        return len(self.members(node))
+
+    def sizes(self) -> list[int]:
+        return [len(members) for members in self._members.values()]
+
+    def components(self) -> list[list[int]]:
+        """Copies of the member lists of every component"""
+        return [list(members) for members in self._members.values()]
+
+    def largest(self, k=1) -> list[int]:
+        """Representatives of the k biggest components, in decreasing sizes"""
+        found = []
+        while self._sizes and len(found) < k:
+            size, root = heapq.heappop(self._sizes)
+            if self._parent[root] == root and len(self._members[root]) == -size:
+                found.append((size, root))
+
+        for entry in found:
+            heapq.heappush(self._sizes, entry)
+
+        return [root for _, root in found]
+
+    def add_edge(self, u, v):
+        cu, cv = self.component(u), self.component(v)
+        if cu == cv or cv in self._out[cu]:
+            return
+
+        # Components reachable from v
+        reachable = {cv}
+        stack = [cv]
+        while stack:
+            for c in self._out[stack.pop()]:
+                if c not in reachable:
+                    reachable.add(c)
+                    stack.append(c)
+
+        if cu not in reachable:
+            self._out[cu].add(cv)
+            self._in[cv].add(cu)
+            return
+
+        # The new edge closes a cycle: merge the components both reachable from v and reaching u
+        cycle = {cu}
+        stack = [cu]
+        while stack:
+            for c in self._in[stack.pop()]:
+                if c in reachable and c not in cycle:
+                    cycle.add(c)
+                    stack.append(c)
+
+        self._merge(cycle)
+
+    def _merge(self, cycle: set[int]):
+        root = max(cycle, key=lambda c: len(self._members[c]))
+        out_edges = set().union(*(self._out.pop(c) for c in cycle)) - cycle
+        in_edges = set().union(*(self._in.pop(c) for c in cycle)) - cycle
+
+        for c in cycle:
+            if c != root:
+                self._parent[c] = root
+                self._members[root].extend(self._members.pop(c))
+
+        for c in out_edges:
+            self._in[c] -= cycle
+            self._in[c].add(root)
+        for c in in_edges:
+            self._out[c] -= cycle
+            self._out[c].add(root)
+
+        self._out[root] = out_edges
+        self._in[root] = in_edges
+        self.count -= len(cycle) - 1
+        heapq.heappush(self._sizes, (-len(self._members[root]), root))
@@ -0,0 +1,189 @@
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy import sparse
+
+from src.schulze.schulze import Schulze, pairwise_defeats, schulze_ranking
+from src.shared_arrays import attach, detach, register
+
+
+def _relax(tile, left, right):
+    """
+    tile[r,c] = max(tile[r,c], min(left[r,p], right[p,c])) for every pivot p, in order
+
+    left or right may be views on tile itself, which gives Floyd-Warshall inside the block
+    """
+    through = np.empty_like(tile)
+    for p in range(left.shape[1]):
+        np.minimum(left[:, p : p + 1], right[p : p + 1, :], out=through)
+        np.maximum(tile, through, out=tile)
+
+
+def _relax_tile(storage, name, shape, dtype, pivots: slice, rows: slice, cols: slice):
+    """
+    Relaxes the tile P[rows, cols] through the pivots of block k once the diagonal tile P[k, k] is closed
+    """
+    P = attach(storage, name, shape, dtype)
+    tile = np.array(P[rows, cols])
+
+    if rows == pivots and cols == pivots:
+        _relax(tile, tile, tile)
+    elif rows == pivots:
+        _relax(tile, np.array(P[pivots, pivots]), tile)
+    elif cols == pivots:
+        _relax(tile, tile, np.array(P[pivots, pivots]))
+    else:
+        _relax(tile, np.array(P[rows, pivots]), np.array(P[pivots, cols]))
+
+    P[rows, cols] = tile
+
+
+def _peak_rss(who=resource.RUSAGE_SELF):
+    """Peak resident set size in bytes"""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _initialize(P, M, blocks):
+    """Writes the pairwise defeats of M into P, one pair of symmetric tiles at a time"""
+
+    def tile(I, J):
+        if sparse.issparse(M):
+            return M[I, J].toarray()
+        return np.asarray(M[I, J])
+
+    for a, I in enumerate(blocks):
+        P[I, I] = pairwise_defeats(tile(I, I))
+
+        for J in blocks[a + 1 :]:
+            # All the pairs (i, j) here have i < j
+            upper = tile(I, J)
+            lower = tile(J, I).T
+            defeated = upper < lower
+            P[I, J] = np.where(defeated, 0, upper)
+            P[J, I] = np.where(defeated, lower, 0).T
+
+
+def blocked_strongest_paths(M, tile_size=1024, workers=None, storage="shared_memory", path=None):
+    """
+    Input: M a comparison matrix (dense, memory-mapped or scipy.sparse) with (i,j) the number of times i is preferred to j
+
+    Output: (P, stats) with P the strongest paths matrix, equal to strongest_paths(M), and stats a dict of timings and
+    peak resident set sizes
+
+    Blocked Floyd-Warshall: for every diagonal tile k, the tile is closed, then the tiles of row and column k are
+    relaxed through it, then every other tile is relaxed through row and column k. The tiles of the last two phases are
+    independent and are dispatched to a process pool.
+
+    tile_size: side of the tiles. Each task holds about 4 tiles in memory
+    workers: size of the process pool (None for os.cpu_count()). With 1 worker everything runs in process
+    storage: "shared_memory" to hold P in a shared memory block (returned as an in-memory copy), or "memmap" to hold it
+    in a .npy file on disk (returned as a memory map)
+    path: file backing the "memmap" storage. By default a temporary file, removed before returning
+    """
+    assert storage in ("shared_memory", "memmap"), f"Unknown storage {storage}"
+
+    start = time.perf_counter()
+    N = M.shape[0]
+    shape = (N, N)
+    dtype = np.dtype(M.dtype)
+    workers = workers or os.cpu_count()
+    blocks = [slice(i, min(i + tile_size, N)) for i in range(0, N, tile_size)]
+
+    temporary = storage == "memmap" and path is None
+    if temporary:
+        fd, path = tempfile.mkstemp(suffix=".npy")
+        os.close(fd)
+
+    shm = name = executor = None
+    try:
+        if storage == "memmap":
+            P = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+            name = path
+        else:
+            shm = shared_memory.SharedMemory(create=True, size=max(dtype.itemsize * N * N, 1))
+            P = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            name = shm.name
+
+        # This process works on P directly, the workers attach to it by name
+        register(name, P, shm)
+        _initialize(P, M, blocks)
+        diagonal = np.diagonal(P).copy()
+        if storage == "memmap":
+            P.flush()
+
+        executor = ProcessPoolExecutor(workers) if workers > 1 and len(blocks) > 1 else None
+        for K in blocks:
+            # Phase 1: close the diagonal tile
+            _relax_tile(storage, name, shape, dtype, K, K, K)
+
+            # Phase 2: row and column K, Phase 3: every other tile
+            for phase in (
+                [(K, J) for J in blocks if J != K] + [(I, K) for I in blocks if I != K],
+                [(I, J) for I in blocks for J in blocks if I != K and J != K],
+            ):
+                if executor is None:
+                    for I, J in phase:
+                        _relax_tile(storage, name, shape, dtype, K, I, J)
+                else:
+                    futures = [
+                        executor.submit(_relax_tile, storage, name, shape, dtype, K, I, J) for I, J in phase
+                    ]
+                    for future in futures:
+                        future.result()
+
+        # Paths from a node to itself are not relaxed
+        np.fill_diagonal(P, diagonal)
+
+        if storage == "memmap":
+            P.flush()
+            result = P
+        else:
+            result = np.array(P)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        detach(name)
+        if shm is not None:
+            # The views of the block are released before closing it
+            P = None
+            shm.close()
+            shm.unlink()
+        if temporary:
+            # The returned memory map stays readable, the disk space is freed when it is released
+            os.remove(path)
+
+    stats = {
+        "N": N,
+        "tile_size": tile_size,
+        "tiles": len(blocks) ** 2,
+        "workers": workers if executor is not None else 1,
+        "storage": storage,
+        "seconds": time.perf_counter() - start,
+        "peak_rss": _peak_rss(),
+        "peak_rss_workers": _peak_rss(resource.RUSAGE_CHILDREN),
+    }
+
+    return result, stats
+
+
+class BlockedSchulze(Schulze):
+    """
+    Schulze ranking with the strongest paths computed tile by tile on a process pool
+    """
+
+    tile_size = 1024
+    workers = None
+    storage = "shared_memory"
+
+    def rank(self) -> list[int]:
+        S, self.stats = blocked_strongest_paths(
+            self.comparisons.votes.sparse, tile_size=self.tile_size, workers=self.workers, storage=self.storage
+        )
+        return schulze_ranking(S)
@@ -3,15 +3,54 @@ import numpy as np
 from src.votes import Vote
 
 
+def pairwise_defeats(M):
+    """
+    Input: M a comparison matrix with (i,j) the number of times i is preferred to j
+
+    Output: a copy of M where the weakest direction of every pair is set to 0 (ties keep the (i,j) direction for i < j)
+    """
+    P = np.copy(M)
+    upper = np.triu(np.ones(np.shape(M), dtype=bool), 1)
+
+    # (i,j) with i < j is dropped when it loses, (j,i) when it loses or ties
+    defeated = (M < M.T) & upper | (M <= M.T) & upper.T
+    P[defeated] = 0
+
+    return P
+
+
 def strongest_paths(M):
     """
     Input: M a comparison matrix with (i,j) the number of times i is preferred to j
 
     Output: P a matrix with (i,j) the strength of the strongest path i->j
 
+    Widest path version of Floyd-Warshall, relaxing all the pairs through one pivot at a time with NumPy broadcasting.
+    Row and column i are left unchanged by pivot i, so the relaxation can be done in place.
+
     Reference: https://en.wikipedia.org/wiki/Schulze_method#Implementation
     """
 
+    N = np.shape(M)[0]
+    P = pairwise_defeats(M)
+    diagonal = np.diagonal(P).copy()
+    through = np.empty_like(P)
+
+    for i in range(N):
+        np.minimum(P[:, i : i + 1], P[i : i + 1, :], out=through)
+        np.maximum(P, through, out=P)
+
+    # Paths from a node to itself are not relaxed
+    np.fill_diagonal(P, diagonal)
+
+    return P
+
+
+def strongest_paths_naive(M):
+    """
+    Naive O(n^3) python implementation of strongest_paths
+    """
+
     N = np.shape(M)[0]
     P = np.copy(M)
 
@@ -32,10 +71,42 @@ def strongest_paths(M):
     return P
 
 
-def schulze_ranking(S):
+def schulze_ranking(S, chunk_size=1024):
     """
     input: strongest path matrix
     output: schulze ranking in increasing order
+
+    Same order as the insertion sort of schulze_ranking_naive: each candidate is inserted before the first ranked
+    candidate that beats it. With sparse votes some pairs beat neither way, the relation is not a weak order and the
+    result depends on the insertions, so each insertion is one vectorized scan of the ranking: O(N^2) comparisons in N
+    numpy calls. Any later candidate can still reach the top, so there is no cheaper top-k selection. S is read by
+    chunks of rows and columns so that it can be a memory map
+    """
+    N = np.shape(S)[0]
+    # ranking[:i] holds the order of the first i candidates
+    ranking = np.zeros(N, dtype=int)
+
+    for start in range(0, N, chunk_size):
+        stop = min(start + chunk_size, N)
+        rows = np.asarray(S[start:stop, :])
+        columns = np.asarray(S[:, start:stop]).T
+
+        for i in range(max(start, 1), stop):
+            ranked = ranking[:i]
+            beaten = rows[i - start, ranked] < columns[i - start, ranked]
+            index = int(beaten.argmax()) if beaten.any() else i
+            ranking[index + 1 : i + 1] = ranking[index:i]
+            ranking[index] = i
+
+    return ranking.tolist()
+
+
+def schulze_ranking_naive(S):
+    """
+    input: strongest path matrix
+    output: schulze ranking in increasing order
+
+    Naive O(n^2) insertion sort
     """
     N = np.shape(S)[0]
     ranking = [0]
@@ -56,5 +127,5 @@ def schulze_ranking(S):
 
 class Schulze(Vote):
     def rank(self) -> list[int]:
-        S = strongest_paths(self.comparisons.matrix)
+        S = strongest_paths(self.comparisons.votes.matrix)
         return schulze_ranking(S)
@@ -0,0 +1,41 @@
+"""
+Arrays shared between processes by name: the name of a shared memory block, or the path of a .npy file
+"""
+
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# Arrays attached by the current process, by storage name
+_attached = {}
+
+
+def attach(storage, name, shape, dtype) -> np.ndarray:
+    """
+    Returns the array stored in a shared memory block ("shared_memory") or a .npy file ("memmap")
+
+    Each process attaches to a name once, later calls return the same array
+    """
+    if name not in _attached:
+        if storage == "memmap":
+            _attached[name] = (np.load(name, mmap_mode="r+"), None)
+        else:
+            try:
+                shm = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError:
+                # Python < 3.13: the creating process is in charge of unlinking the block
+                shm = shared_memory.SharedMemory(name=name)
+                resource_tracker.unregister(shm._name, "shared_memory")
+            _attached[name] = (np.ndarray(shape, dtype=dtype, buffer=shm.buf), shm)
+
+    return _attached[name][0]
+
+
+def register(name, array, shm=None):
+    """Makes an array created by this process available to attach, e.g. when the work runs in process"""
+    _attached[name] = (array, shm)
+
+
+def detach(name):
+    """Forgets the array attached under name, the creator stays in charge of closing and removing its storage"""
+    _attached.pop(name, None)
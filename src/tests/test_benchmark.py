@@ -0,0 +1,59 @@
+import json
+
+from src.benchmark import *
+from src.bradley_terry.bradley_terry import BradleyTerry
+from src.pagerank.pagerank import PageRank
+from src.pairings import RandomCycles
+
+
+def test_run(tmp_path):
+    configs = [
+        Config("BT", BradleyTerry, RandomCycles, N=30, budget=200, trials=3),
+        Config("PR", PageRank, N=30, budget=200, trials=2),
+    ]
+    output = tmp_path / "benchmark.json"
+    log = tmp_path / "benchmark.jsonl"
+
+    scores = run(configs, seed=42, workers=2, output=output, log=log)
+
+    assert json.loads(output.read_text()) == scores
+    assert [len(scores["BT"]), len(scores["PR"])] == [3, 2]
+
+    # Trials are reproducible, in process or not
+    assert run(configs, seed=42, workers=1, output=None) == scores
+
+    records = [json.loads(line) for line in log.read_text().splitlines()]
+    assert len(records) == 5
+
+    record = records[0]
+    config = configs[0] if record["label"] == "BT" else configs[1]
+    assert replay_trial(config, record)["score"] == record["score"]
+
+
+def test_run_with_cache(tmp_path):
+    cache = ResultCache(tmp_path / "cache")
+    configs = [Config("BT", BradleyTerry, RandomCycles, N=30, budget=200, trials=2)]
+    scores = run(configs, seed=7, workers=1, output=None, cache=cache)
+    assert len(cache) == 2
+
+    # Extending the sweep only computes the new trials
+    log = tmp_path / "benchmark.jsonl"
+    extended = [configs[0]._replace(trials=3), Config("PR", PageRank, N=30, budget=200, trials=1)]
+    more_scores = run(extended, seed=7, workers=1, output=None, log=log, cache=cache)
+
+    assert more_scores["BT"][:2] == scores["BT"]
+    cached = {(record["label"], record["trial"]): record["cached"] for record in map(json.loads, open(log))}
+    assert cached == {("BT", 0): True, ("BT", 1): True, ("BT", 2): False, ("PR", 0): False}
+
+
+def test_run_with_profile(tmp_path):
+    configs = [Config("BT", BradleyTerry, RandomCycles, N=30, budget=200, trials=2)]
+    profile_output = tmp_path / "profile.json"
+    log = tmp_path / "benchmark.jsonl"
+    scores = run(configs, seed=3, workers=1, output=None, log=log, profile="time", profile_output=profile_output)
+
+    assert scores == run(configs, seed=3, workers=1, output=None)
+    profile = json.loads(profile_output.read_text())["BT"]
+    assert profile["trials"] == 2
+    assert profile["phases"]["BradleyTerry.start_vote"]["calls"] == 2
+    assert all("profile" in json.loads(line) for line in log.read_text().splitlines())
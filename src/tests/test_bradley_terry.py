@@ -1,6 +1,9 @@
+import warnings
+
 import numpy as np
+from scipy import sparse
 
-from src.bradley_terry.bradley_terry import bradley_terry_scores
+from src.bradley_terry.bradley_terry import *
 
 
 def test_bradley_terry_scores():
@@ -34,3 +37,57 @@ def test_bradley_terry_scores():
 
     for i, p in enumerate(estimates):
         assert round(p, 3) == values[i]
+
+
+def test_bradley_terry_mm():
+    M = np.array([[0, 2, 0, 1], [3, 0, 5, 0], [0, 3, 0, 1], [4, 0, 3, 0]])
+
+    scores, iterations = bradley_terry_mm(M, tol=1e-10)
+
+    assert iterations < 1000
+    assert np.isclose(sum(scores), 1)
+    assert [round(p, 3) for p in scores] == [0.139, 0.226, 0.143, 0.492]
+
+    # Warm starting from the solution converges right away
+    _, warm_iterations = bradley_terry_mm(M, tol=1e-10, scores=scores)
+    assert warm_iterations < iterations
+
+
+def test_bradley_terry_mm_isolated_entry():
+    M = np.zeros((3, 3))
+    M[0][1] = 1
+    M[1][0] = 2
+
+    scores, _ = bradley_terry_mm(M)
+
+    assert scores[2] == 0
+    assert np.isclose(sum(scores), 1)
+
+
+def test_bradley_terry_mm_vanishing_scores():
+    # Warm started from vanishing scores, the games of 0 and 1 overflow to a zero score without warning
+    M = np.array([[0, 1, 0], [1, 0, 0], [1, 1, 0]])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        scores, _ = bradley_terry_mm(M, scores=[1e-320, 1e-320, 1])
+
+    assert np.allclose(scores, [0, 0, 1])
+
+
+def test_sparse_bradley_terry_scores():
+    M = np.array([[0, 2, 0, 1], [3, 0, 5, 0], [0, 3, 0, 1], [4, 0, 3, 0]])
+
+    # Without regularization this is the maximum likelihood estimate found by the MM algorithm
+    scores, _ = sparse_bradley_terry_scores(sparse.csr_array(M), regularization=0)
+
+    assert np.allclose(scores, bradley_terry_mm(M, tol=1e-12)[0], atol=1e-6)
+
+
+def test_sparse_bradley_terry_disconnected():
+    # Two components that never met and an entry without any vote
+    M = np.array([[0, 2, 0, 1], [3, 0, 5, 0], [0, 3, 0, 1], [4, 0, 3, 0]])
+    scores, _ = sparse_bradley_terry_scores(sparse.block_diag([M, M, np.zeros((1, 1))]))
+
+    assert np.all(np.isfinite(scores))
+    assert np.allclose(scores[:4], scores[4:8])
+    assert ranking_from_scores(scores[:4]) == [0, 2, 1, 3]
@@ -0,0 +1,54 @@
+import os
+
+import numpy as np
+
+from src.bradley_terry.bradley_terry import BradleyTerry
+from src.cache import *
+from src.pairings import Random
+
+
+def test_keys_depend_on_every_field(tmp_path):
+    cache = ResultCache(tmp_path)
+    key = cache.key(N=10, seed=1)
+    assert key == cache.key(seed=1, N=10)
+    assert key != cache.key(N=10, seed=2)
+
+
+def test_seed_fingerprint():
+    assert seed_fingerprint(3) == 3
+    assert seed_fingerprint(np.random.SeedSequence(5).spawn(2)[1])["spawn_key"] == [1]
+    assert seed_fingerprint(None) is None
+    assert seed_fingerprint(np.random.default_rng(0)) is None
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=320)
+    for i in range(3):
+        cache.put(f"k{i}", {"payload": "x" * 90})
+        os.utime(tmp_path / f"k{i}.json", (i, i))
+
+    # Reading k0 makes k1 the least recently used
+    assert cache.get("k0") is not None
+    cache.put("k3", {"payload": "x" * 90})
+    assert cache.get("k1") is None
+    assert cache.get("k0") is not None and cache.get("k3") is not None
+
+
+def test_vote_skips_cached_simulations(tmp_path):
+    cache = ResultCache(tmp_path)
+    first = BradleyTerry(40, 400, Random, p=0.9, rng=3, cache=cache)
+    score = first.score()
+
+    second = BradleyTerry(40, 400, Random, p=0.9, rng=3, cache=cache)
+    assert second.cached is not None
+    assert second.score() == score
+    assert second.budget == 400
+
+    # Reading the votes simulates them, rank() matches the cached ranking
+    assert list(second.rank()) == second.cached["ranking"]
+    assert second.comparisons.votes.total == 400
+
+    # A Generator can't be replayed, nothing is cached
+    assert BradleyTerry(40, 400, Random, p=0.9, rng=np.random.default_rng(3), cache=cache).cached is None
+    # Extending a cached run simulates all of its votes
+    assert second.extend(100).comparisons.votes.total == 500
@@ -0,0 +1,67 @@
+import numpy as np
+
+from src.crowd_bt import crowd_bt
+from src.crowd_bt.crowd_bt import CrowdBT, CrowdBTPairings
+from src.crowd_bt.models import NO_ITEM, Annotators, Items
+from src.crowd_bt.session import simulate
+
+
+def test_information_gain_is_elementwise():
+    items = Items(5)
+    items.mu[:] = np.linspace(-1, 1, 5)
+    items.sigma_sq[:] = np.linspace(0.5, 1.5, 5)
+    annotator = Annotators(1, items)[0]
+    annotator.prev = items[0]
+
+    gains = crowd_bt.expected_information_gain(
+        annotator.alpha, annotator.beta, items[0].mu, items[0].sigma_sq, items.mu, items.sigma_sq
+    )
+    for item in items:
+        gain = crowd_bt.expected_information_gain(
+            annotator.alpha, annotator.beta, items[0].mu, items[0].sigma_sq, item.mu, item.sigma_sq
+        )
+        assert np.isclose(gains[item.id], gain)
+
+
+def test_item_views_write_through():
+    items = Items(3)
+    items[1].mu = 2.0
+    items[2].sigma_sq = 0.5
+    assert items.mu.tolist() == [0, 2, 0]
+    assert items.sigma_sq.tolist() == [1, 1, 0.5]
+
+
+def test_crowd_bt_is_reproducible():
+    first = CrowdBT(30, 300, CrowdBTPairings, rng=3)
+    second = CrowdBT(30, 300, CrowdBTPairings, rng=3)
+    assert first.rank() == second.rank()
+    assert sorted(first.rank()) == list(range(30))
+
+
+def test_annotator_views():
+    items = Items(4)
+    annotators = Annotators(10, items)
+    annotator = annotators[7]
+    assert annotator.prev is None and annotator.next is None
+
+    annotator.update_next(items[2])
+    annotator.update_next(items[3])
+    annotator.alpha = 5.0
+    assert (annotator.prev.id, annotator.next.id) == (2, 3)
+    assert annotators.prev.tolist() == [NO_ITEM] * 7 + [2] + [NO_ITEM] * 2
+    assert annotators[7].alpha == 5.0
+
+
+def test_crowd_bt_annotator_count():
+    pairings = CrowdBTPairings(20, rng=0, annotators=1000)
+    assert len(pairings.annotators) == 1000
+    a, b = pairings.next_comparison()
+    assert 0 <= a < 20 and 0 <= b < 20
+
+
+def test_judging_session_report():
+    report = simulate(N=30, judges=8, budget=200, think_time=0, batch_size=4, rng=0)
+    assert report["votes"] == 200
+    assert report["judges"] == 8
+    assert 0 <= report["latency"]["p50"] <= report["latency"]["p99"] <= report["latency"]["max"]
+    assert 0 <= report["score"] <= 1
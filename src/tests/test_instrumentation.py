@@ -0,0 +1,56 @@
+from src.bradley_terry.bradley_terry import BradleyTerry
+from src.instrumentation import *
+from src.pairings import CCSlow, RandomCycles
+
+
+def test_disabled_by_default():
+    vote = BradleyTerry(20, 60, RandomCycles, rng=0)
+    assert "start_vote" not in vars(vote)
+    assert "record_vote" not in vars(vote.comparisons)
+
+
+def test_profile_vote():
+    profiler = Profiler()
+    vote = BradleyTerry(20, 60, CCSlow, rng=0, profiler=profiler)
+    vote.score()
+    report = profiler.report()
+    phases = report["phases"]
+
+    assert phases["BradleyTerry.start_vote"]["calls"] == 1
+    assert phases["BradleyTerry.rank"]["calls"] == 1
+    assert phases["CCSlow.record_vote"]["calls"] == 60
+
+    # Nested phases are counted once in the self times
+    assert phases["BradleyTerry.start_vote"]["self_seconds"] < phases["BradleyTerry.start_vote"]["seconds"]
+    assert sum(stats["self_seconds"] for stats in phases.values()) <= report["seconds"]
+
+    # Same trial as without profiler
+    assert list(vote.rank()) == list(BradleyTerry(20, 60, CCSlow, rng=0).rank())
+
+
+def test_peak_memory():
+    profiler = Profiler(memory=True)
+
+    class Allocator:
+        def outer(self):
+            self.inner()
+            return bytearray(1 << 20)
+
+        def inner(self):
+            return bytearray(4 << 20)
+
+    profiler.instrument(Allocator(), ["outer", "inner"]).outer()
+    profiler.stop()
+    phases = profiler.report()["phases"]
+    assert phases["Allocator.inner"]["peak_bytes"] >= 4 << 20
+    assert phases["Allocator.outer"]["peak_bytes"] >= 4 << 20
+
+
+def test_aggregate():
+    reports = [
+        {"seconds": 1.0, "phases": {"a": {"calls": 2, "seconds": 0.5, "self_seconds": 0.5, "peak_bytes": 10}}},
+        {"seconds": 3.0, "phases": {"a": {"calls": 1, "seconds": 1.5, "self_seconds": 1.5, "peak_bytes": 5}}},
+    ]
+    total = aggregate(reports)
+    assert total["trials"] == 2
+    assert total["phases"]["a"] == {"calls": 3, "seconds": 2.0, "self_seconds": 2.0, "peak_bytes": 10, "share": 0.5}
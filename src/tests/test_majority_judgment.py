@@ -0,0 +1,79 @@
+import numpy as np
+
+from src.majority_judgment.majority_judgment import *
+
+
+def majority_values_naive(grades: list[int]) -> list[int]:
+    grades = sorted(grades)
+    values = []
+    while grades:
+        values.append(grades.pop((len(grades) - 1) // 2))
+    return values
+
+
+def test_lower_median_bins():
+    counts = np.array([[1, 1, 1, 0], [0, 2, 0, 2], [0, 0, 0, 1], [0, 0, 0, 0]])
+    assert lower_median_bins(counts).tolist() == [1, 1, 3, 0]
+
+
+def test_majority_ranking_matches_naive():
+    rng = np.random.default_rng(0)
+    N, bins = 40, 4
+    grades = [rng.integers(bins, size=rng.integers(1, 8)).tolist() for _ in range(N)]
+    counts = np.zeros((N, bins), dtype=int)
+    for item, item_grades in enumerate(grades):
+        np.add.at(counts[item], item_grades, 1)
+
+    # Running out of grades ranks below any grade
+    naive = sorted(range(N), key=lambda i: majority_values_naive(grades[i]) + [-1])
+    assert majority_ranking(counts) == naive
+
+
+def test_ranking_matches_raw_grade_medians():
+    # The former implementation sorted the items by np.median of their raw grades. With integer grades in their own
+    # bins, an odd number of grades per item and distinct medians, both rankings agree
+    rng = np.random.default_rng(1)
+    medians = rng.permutation(11)
+    grades = []
+    for median in medians:
+        half = rng.integers(0, 4)
+        grades.append([median, *rng.integers(0, median + 1, size=half), *rng.integers(median, 11, size=half)])
+
+    histogram = GradeHistogram(len(grades), bins=11, low=0, high=10)
+    for item, item_grades in enumerate(grades):
+        histogram.add_many(np.full(len(item_grades), item), item_grades)
+
+    assert histogram.ranking() == sorted(range(len(grades)), key=lambda i: np.median(grades[i]))
+
+
+def test_grade_histogram():
+    grades = GradeHistogram(3, bins=11, low=0, high=10)
+    grades.add_many([0, 0, 0, 1, 2], [2.0, 7.0, 9.9, 4.2, -3])
+    grades.add(1, 11)
+    assert grades.counts.sum() == 6
+    assert grades.medians().tolist() == [7, 4, 0]
+    assert grades.ranking() == [2, 1, 0]
+
+
+def test_majority_judgement():
+    vote = MajorityJudgement(100, 2000, spread=1, rng=0)
+    assert sorted(vote.rank()) == list(range(100))
+    assert vote.score() <= 0.5
+
+
+def test_cached_medians():
+    rng = np.random.default_rng(1)
+    grades = GradeHistogram(20, bins=21)
+    for item, grade in zip(rng.integers(20, size=300), rng.uniform(0, 10, size=300)):
+        grades.add(item, grade)
+    grades.add_many(rng.integers(20, size=300), rng.uniform(0, 10, size=300))
+
+    assert grades.median_bins.tolist() == lower_median_bins(grades.counts).tolist()
+    assert grades.ranking() == majority_ranking(grades.counts)
+
+
+def test_majority_judgment_trials():
+    scores = majority_judgment_trials(5, 100, 2000, spread=1, rng=0)
+    assert scores.shape == (5,)
+    assert np.all((0 <= scores) & (scores <= 1))
+    assert scores.tolist() == majority_judgment_trials(5, 100, 2000, spread=1, rng=0).tolist()
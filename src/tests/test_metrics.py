@@ -0,0 +1,54 @@
+import numpy as np
+
+from src.metrics import *
+from src.utilities import kendall_tau_naive, top_10
+
+
+def test_inverse_permutations():
+    rankings = np.array([[2, 0, 1], [0, 1, 2]])
+    assert inverse_permutations(rankings).tolist() == [[1, 2, 0], [0, 1, 2]]
+
+
+def test_count_inversions():
+    assert count_inversions([[0, 1, 2, 3], [3, 2, 1, 0], [1, 0, 2, 3]]).tolist() == [0, 6, 1]
+
+
+def test_batches_match_single_rankings():
+    rng = np.random.default_rng(0)
+    truth = rng.permutation(50)
+    rankings = np.array([rng.permutation(50) for _ in range(8)])
+
+    for metric in (kendall_tau_distance, weighted_distances, top_k_distance, rbo_distance):
+        batch = metric(truth, rankings)
+        assert batch.shape == (8,)
+        assert np.allclose(batch, [metric(truth, ranking) for ranking in rankings])
+
+
+def test_kendall_tau_matches_naive():
+    rng = np.random.default_rng(1)
+    for N in (2, 7, 33):
+        truth, ranking = rng.permutation(N), rng.permutation(N)
+        assert np.isclose(kendall_tau_distance(truth, ranking), kendall_tau_naive(list(truth), list(ranking)))
+
+
+def test_top_k_matches_top_10():
+    rng = np.random.default_rng(2)
+    truth, ranking = rng.permutation(100), rng.permutation(100)
+    assert top_k_distance(truth, ranking) == top_10(list(truth), list(ranking))
+
+
+def test_rbo_distance():
+    truth = np.arange(20)
+    assert np.isclose(rbo_distance(truth, truth), 0)
+    # Swapping the two best items costs more than swapping the two worst ones
+    best_swapped = np.r_[truth[:-2], 19, 18]
+    worst_swapped = np.r_[1, 0, truth[2:]]
+    assert rbo_distance(truth, best_swapped) > rbo_distance(truth, worst_swapped) > 0
+
+
+def test_top_k_with_a_truth_per_ranking():
+    rng = np.random.default_rng(3)
+    truths = np.array([rng.permutation(30) for _ in range(4)])
+    rankings = np.array([rng.permutation(30) for _ in range(4)])
+    expected = [top_k_distance(truth, ranking) for truth, ranking in zip(truths, rankings)]
+    assert np.allclose(top_k_distance(truths, rankings), expected)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+from src.bradley_terry.bradley_terry import bradley_terry_mm
+from src.monte_carlo import *
+from src.pairings import CCZip, Random, RandomCycles
+from src.utilities import random_cycles
+
+
+@pytest.mark.parametrize("comparisons_cls", [Random, RandomCycles])
+def test_random_schedules(comparisons_cls):
+    pairs = random_schedules(3, 20, 95, comparisons_cls, rematch=2, rng=0)
+    assert pairs.shape == (3, 95, 2)
+    assert (pairs[..., 0] != pairs[..., 1]).all()
+    assert (pairs[:, 0:94:2] == pairs[:, 1:94:2]).all()
+
+    with pytest.raises(ValueError):
+        random_schedules(3, 20, 95, CCZip)
+
+
+def test_batched_votes_follow_the_true_rankings():
+    true_rankings = random_cycles(4, 30, rng=1)
+    pairs = random_schedules(4, 30, 200, rng=1)
+    losers, winners = batched_votes(true_rankings, pairs, p=1, rng=1)
+
+    positions = inverse_permutations(true_rankings)
+    assert (np.take_along_axis(positions, winners, 1) > np.take_along_axis(positions, losers, 1)).all()
+
+
+def test_batched_bradley_terry_matches_single_trials():
+    N, budget = 40, 300
+    true_rankings = random_cycles(5, N, rng=2)
+    losers, winners = batched_votes(true_rankings, random_schedules(5, N, budget, RandomCycles, rng=2), 0.9, rng=2)
+    scores, iterations = batched_bradley_terry(N, winners, losers)
+
+    for t in range(5):
+        M = sparse.coo_array((np.ones(budget), (winners[t], losers[t])), shape=(N, N))
+        expected, expected_iterations = bradley_terry_mm(M)
+        assert np.allclose(scores[t], expected)
+        assert iterations[t] == expected_iterations
+
+
+def test_bradley_terry_trials_chunks():
+    scores = bradley_terry_trials(5, N=30, budget=300, rng=3)
+    assert scores.shape == (5,)
+    assert np.all((0 <= scores) & (scores <= 1))
+
+    assert trials_per_chunk(30, 300, memory=1) == 1
+    assert bradley_terry_trials(5, N=30, budget=300, memory=1, rng=3).shape == (5,)
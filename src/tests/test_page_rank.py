@@ -1,6 +1,9 @@
 import networkx as nx
+import numpy as np
 
 from src.pagerank.pagerank import *
+from src.pairings import Random
+from src.vote_store import VoteStore
 
 
 def test_page_rank():
@@ -10,3 +13,34 @@ def test_page_rank():
 
     rank = page_rank(G)
     assert rank == [0, 1, 2]
+
+
+def test_pagerank_scores_matches_networkx():
+    rng = np.random.default_rng(0)
+    N = 40
+    store = VoteStore(N)
+    winners = rng.integers(N, size=200)
+    store.record_many(winners, (winners + rng.integers(1, N, size=200)) % N)
+
+    pr = nx.pagerank(store.graph)
+    scores, iterations = pagerank_scores(store.sparse)
+
+    assert np.allclose(scores, [pr[i] for i in range(N)], atol=1e-6)
+    assert ranking_from_pagerank(scores) == page_rank(store.graph)
+
+    # Warm start after a few more votes
+    store.record_many([0, 1], [2, 3])
+    _, warm_iterations = pagerank_scores(store.sparse, scores=scores)
+    _, cold_iterations = pagerank_scores(store.sparse)
+
+    assert warm_iterations < cold_iterations
+
+
+def test_iterated_page_rank_starts_from_a_random_cycle():
+    def pairs(seed):
+        M = IteratedPageRank(10, 10, Random, p=1, rng=seed).comparisons.votes.matrix
+        return (M + M.T) > 0
+
+    # The first round votes on the edges of a cycle that depends on the seed
+    assert pairs(1).sum() == pairs(2).sum() == 20
+    assert not np.array_equal(pairs(1), pairs(2))
@@ -78,3 +78,17 @@ def test_ccslow():
         comparison_object.record_vote(a, b)
 
     assert len(list(nx.strongly_connected_components(comparison_object.graph))) < 10
+
+
+def test_fast_reachability_pairings():
+    comparison_object = FastReachability(10)
+
+    for _ in range(3):
+        nodes_visited = set()
+        for i in range(10):
+            (a, b) = comparison_object.next_comparison()
+            comparison_object.record_vote(a, b)
+            nodes_visited.add(a)
+            nodes_visited.add(b)
+
+        assert len(nodes_visited) == 10
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from src.bradley_terry.bradley_terry import BradleyTerry
+from src.pagerank.pagerank import PageRank
+from src.pairings import RandomCycles
+from src.pipeline import *
+from src.schulze.schulze import Schulze
+
+RANKERS = {"BT": BradleyTerry, "PageRank": PageRank, "Schulze": Schulze}
+
+
+def test_rankers_see_the_same_votes_as_their_own_simulation():
+    seed = np.random.SeedSequence(4)
+    pipeline = Pipeline(60, 600, RandomCycles, rng=seed)
+    for label, vote_cls in RANKERS.items():
+        pipeline.register(label, vote_cls)
+
+    scores = pipeline.run()
+    for label, vote_cls in RANKERS.items():
+        assert scores[label] == vote_cls(60, 600, RandomCycles, p=0.9, rng=np.random.SeedSequence(4)).score()
+
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_parallel_modes_match_serial(mode):
+    pipeline = Pipeline(40, 400, rng=1)
+    for label, vote_cls in RANKERS.items():
+        pipeline.register(label, vote_cls)
+
+    assert pipeline.run(mode=mode, workers=2) == pipeline.run()
+
+
+def test_compare_layout():
+    scores = compare(RANKERS, trials=3, seed=0, N=30, budget=300)
+    assert list(scores) == list(RANKERS)
+    assert all(len(trial_scores) == 3 for trial_scores in scores.values())
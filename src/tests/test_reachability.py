@@ -0,0 +1,30 @@
+import networkx as nx
+import numpy as np
+
+from src.reachability import *
+
+
+def test_reachability_index_matches_networkx():
+    N = 70
+    rng = np.random.default_rng(0)
+    reachability = ReachabilityIndex(N)
+    G = nx.DiGraph()
+    G.add_nodes_from(range(N))
+
+    for _ in range(4):
+        for u, v in rng.integers(N, size=(20, 2)):
+            reachability.add_edge(u, v)
+            G.add_edge(u, v)
+
+        for u in range(N):
+            expected = nx.descendants(G, u) | {u}
+
+            assert set(np.flatnonzero(reachability.reachable_from(u))) == expected
+            assert reachability.counts[u] == len(expected)
+            assert set(np.flatnonzero(reachability.reaching(u))) == nx.ancestors(G, u) | {u}
+
+
+def test_popcount():
+    rows = np.array([[0, 1], [3, 2**63 + 1]], dtype=np.uint64)
+
+    assert list(popcount(rows)) == [1, 4]
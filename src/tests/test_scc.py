@@ -0,0 +1,42 @@
+import networkx as nx
+import numpy as np
+
+from src.scc import IncrementalSCC
+
+
+def test_incremental_scc_matches_networkx():
+    N = 60
+    rng = np.random.default_rng(0)
+    scc = IncrementalSCC(N)
+    G = nx.DiGraph()
+    G.add_nodes_from(range(N))
+
+    for _ in range(8):
+        for u, v in rng.integers(N, size=(15, 2)):
+            scc.add_edge(u, v)
+            G.add_edge(u, v)
+
+        components = list(nx.strongly_connected_components(G))
+
+        assert len(scc) == len(components)
+        assert sorted(map(sorted, scc.components())) == sorted(map(sorted, components))
+        assert sorted(scc.sizes()) == sorted(map(len, components))
+
+        for component in components:
+            assert len({scc.component(node) for node in component}) == 1
+
+        biggest = scc.largest(2)
+        assert [scc.size(c) for c in biggest] == sorted(map(len, components), reverse=True)[:2]
+
+
+def test_incremental_scc_cycle():
+    scc = IncrementalSCC(4)
+
+    scc.add_edge(0, 1)
+    scc.add_edge(1, 2)
+    assert len(scc) == 4
+
+    scc.add_edge(2, 0)
+    assert len(scc) == 2
+    assert sorted(scc.members(1)) == [0, 1, 2]
+    assert scc.largest(3) == [scc.component(0), 3]
@@ -1,5 +1,10 @@
+import tempfile
+
 import numpy as np
+import pytest
+from scipy import sparse
 
+from src.schulze.blocked_schulze import blocked_strongest_paths
 from src.schulze.schulze import *
 
 
@@ -60,3 +65,93 @@ def test_strongest_path_and_ranking():
     ranking = schulze_ranking(P)
 
     assert ranking == [3, 1, 2, 0, 4]
+
+
+def test_strongest_paths_matches_naive():
+    rng = np.random.default_rng(0)
+
+    for N in [2, 3, 7, 20]:
+        # Small integer counts to get plenty of ties
+        M = rng.integers(0, 4, size=(N, N)).astype(float)
+        np.fill_diagonal(M, 0)
+
+        assert np.array_equal(strongest_paths(M), strongest_paths_naive(M))
+
+
+def test_pairwise_defeats():
+    M = np.array([[0, 2, 1], [1, 0, 3], [1, 3, 0]])
+
+    assert np.array_equal(pairwise_defeats(M), np.array([[0, 2, 1], [0, 0, 3], [0, 0, 0]]))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("tile_size", [4, 7, 30])
+def test_blocked_strongest_paths(workers, tile_size, tmp_path):
+    rng = np.random.default_rng(1)
+    M = rng.integers(0, 4, size=(23, 23)).astype(float)
+    np.fill_diagonal(M, 0)
+    S = strongest_paths(M)
+
+    P, stats = blocked_strongest_paths(M, tile_size=tile_size, workers=workers)
+    assert np.array_equal(P, S)
+    assert stats["peak_rss"] > 0
+
+    P, _ = blocked_strongest_paths(
+        sparse.csr_array(M), tile_size=tile_size, workers=workers, storage="memmap", path=tmp_path / "P.npy"
+    )
+    assert isinstance(P, np.memmap)
+    assert np.array_equal(P, S)
+
+
+def test_blocked_strongest_paths_removes_temporary_files(tmp_path, monkeypatch):
+    from src import shared_arrays
+    from src.schulze import blocked_schulze
+
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    M = np.random.default_rng(1).integers(0, 5, size=(20, 20)).astype(float)
+    np.fill_diagonal(M, 0)
+
+    # The memory map stays readable after its file is removed
+    P, _ = blocked_strongest_paths(sparse.csr_array(M), tile_size=8, workers=1, storage="memmap")
+    assert list(tmp_path.iterdir()) == []
+    assert np.array_equal(P, strongest_paths(M))
+
+    # Also on errors
+    def fail(*args):
+        raise RuntimeError
+
+    monkeypatch.setattr(blocked_schulze, "_relax_tile", fail)
+    for storage in ["memmap", "shared_memory"]:
+        with pytest.raises(RuntimeError):
+            blocked_strongest_paths(sparse.csr_array(M), tile_size=8, workers=1, storage=storage)
+    assert list(tmp_path.iterdir()) == []
+    assert shared_arrays._attached == {}
+
+
+def test_schulze_ranking_matches_naive():
+    rng = np.random.default_rng(2)
+
+    matrices = []
+    for N in [2, 5, 30, 60]:
+        # Dense counts
+        matrices.append(rng.integers(0, 3, size=(N, N)).astype(float))
+        # Sparse votes, most pairs are incomparable
+        matrices.append((rng.random((N, N)) < 2 / N).astype(float))
+        # Two groups that never met
+        M = rng.integers(0, 3, size=(N, N)).astype(float)
+        M[: N // 2, N // 2 :] = M[N // 2 :, : N // 2] = 0
+        matrices.append(M)
+
+    no_votes = np.zeros((3, 3))
+    one_vote = np.zeros((3, 3))
+    one_vote[0, 1] = 1
+    matrices += [no_votes, one_vote]
+
+    for M in matrices:
+        np.fill_diagonal(M, 0)
+        P = strongest_paths(M)
+        ranking = schulze_ranking(P, chunk_size=7)
+
+        assert ranking == schulze_ranking_naive(P)
+
+    assert schulze_ranking(strongest_paths(one_vote)) == [1, 0, 2]
@@ -19,6 +19,14 @@ def test_vote(pair):
     assert vote(pair, ranking) == tuple(sorted(pair))
 
 
+def test_vote_generator():
+    # Votes draw from the given generator, without reseeding it
+    a, b = np.random.default_rng(0), np.random.default_rng(0)
+    votes = [vote((0, 1), [0, 1], 0.5, a) for _ in range(20)]
+    assert votes == [vote((0, 1), [0, 1], 0.5, b) for _ in range(20)]
+    assert len(set(votes)) == 2
+
+
 @pytest.mark.parametrize("N", [2, 3, 4])
 def test_random_cycle(N):
     iterations = 1000
@@ -106,3 +114,46 @@ def test_clip():
     assert clip(3, 2, 5) == 3
     assert clip(6, 2, 5) == 5
     assert clip(1, 2, 5) == 2
+
+
+@pytest.mark.parametrize("pair", [(0, 1), (1, 0), (0, 3), (2, 1)])
+def test_oracle(pair):
+    oracle = Oracle([3, 0, 1, 2])
+    expected = vote(pair, [3, 0, 1, 2])
+
+    assert oracle.vote(pair) == expected
+
+    losers, winners = oracle.votes([pair, pair[::-1]])
+    assert list(losers) == [expected[0]] * 2
+    assert list(winners) == [expected[1]] * 2
+
+
+def test_oracle_noise():
+    oracle = Oracle(list(range(10)), p=0.8)
+    pairs = np.tile([[2, 7]], (10_000, 1))
+
+    losers, _ = oracle.votes(pairs)
+    assert 0.75 < np.mean(losers == 2) < 0.85
+
+    oracle.p = 0
+    assert oracle.vote((2, 7)) == (7, 2)
+
+
+def test_random_cycles():
+    cycles = random_cycles(50, 8, rng=0)
+    assert cycles.shape == (50, 8)
+    assert (cycles[:, 0] == 0).all()
+    assert all(sorted(cycle) == list(range(8)) for cycle in cycles.tolist())
+
+
+def test_cycle_edge_array():
+    edges = cycle_edge_array([0, 3, 1, 2])
+    assert edges.tolist() == [[0, 3], [1, 3], [1, 2], [0, 2]]
+    assert cycle_edge_array(random_cycles(3, 5, rng=0)).shape == (3, 5, 2)
+
+
+def test_random_expander_edges():
+    edges = random_expander_edges(3, 40, rng=0)
+    degrees = np.bincount(np.array(edges).ravel(), minlength=40)
+    assert len(set(edges)) == len(edges) == 3 * 40
+    assert (degrees == 6).all()
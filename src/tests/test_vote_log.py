@@ -0,0 +1,62 @@
+import json
+
+import numpy as np
+
+from src.pairings import Pairings, RandomCycles
+from src.vote_log import *
+
+
+def test_append_and_read_back(tmp_path):
+    log = VoteLog.create(tmp_path / "votes.bin")
+    log.append([3, 1], [0, 2], timestamps=[1.0, 2.0], annotators=7)
+    log.append([5], [4], grades=[8.5])
+
+    log = VoteLog(tmp_path / "votes.bin")
+    assert len(log) == 3
+    assert log.N == 6
+    records = log.records
+    assert records["winner"].tolist() == [3, 1, 5]
+    assert records["annotator"].tolist() == [7, 7, -1]
+    assert np.isnan(records["timestamp"][2]) and records["grade"][2] == 8.5
+    assert [len(chunk) for chunk in log.chunks(2)] == [2, 1]
+
+
+def test_replay_matches_the_simulated_votes(tmp_path):
+    rng = np.random.default_rng(0)
+    winners, losers = rng.integers(30, size=(2, 1000))
+
+    log = VoteLog.create(tmp_path / "votes.bin", N=30)
+    log.append(winners, losers)
+
+    expected = Pairings(30)
+    expected.record_votes(winners, losers)
+    assert np.array_equal(log.load(chunk_size=64).matrix, expected.matrix)
+
+    one_by_one = log.replay(RandomCycles(30), chunk_size=100, batched=False)
+    assert np.array_equal(one_by_one.matrix, expected.matrix)
+
+
+def test_converters(tmp_path):
+    (tmp_path / "votes.csv").write_text("winner,loser,annotator,grade\n1,0,4,\n2,1,,3.5\n")
+    (tmp_path / "votes.jsonl").write_text(
+        "\n".join(json.dumps(row) for row in [{"winner": 1, "loser": 0, "annotator": 4}, {"winner": 2, "loser": 1, "grade": 3.5}])
+    )
+
+    for log in (
+        from_csv(tmp_path / "votes.csv", tmp_path / "csv.bin", chunk_size=1),
+        from_jsonl(tmp_path / "votes.jsonl", tmp_path / "jsonl.bin"),
+    ):
+        records = log.records
+        assert records["winner"].tolist() == [1, 2]
+        assert records["loser"].tolist() == [0, 1]
+        assert records["annotator"].tolist() == [4, -1]
+        assert np.isnan(records["grade"][0]) and records["grade"][1] == 3.5
+
+
+def test_rank_a_log(tmp_path):
+    from src.bradley_terry.bradley_terry import BradleyTerry
+
+    log = VoteLog.create(tmp_path / "votes.bin")
+    # 2 beats 1 beats 0, with a few upsets
+    log.append([1, 2, 2, 0, 1, 2], [0, 1, 0, 1, 2, 1])
+    assert BradleyTerry.from_comparisons(log.load()).rank() == [0, 1, 2]
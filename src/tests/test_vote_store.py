@@ -0,0 +1,49 @@
+import numpy as np
+
+from src.vote_store import *
+
+
+def test_vote_store():
+    store = VoteStore(10, capacity=2)
+
+    store.record(0, 1)
+    store.record(0, 1)
+    store.record(3, 2)
+
+    assert store.total == 3
+    assert store.matrix[0][1] == 2
+    assert store.sparse[0, 1] == 2
+    assert store.graph.edges[(0, 1)]["weight"] == 2
+
+    # Views are kept in sync with the new votes
+    store.record_many([3, 4], [2, 5])
+
+    assert store.total == 5
+    assert store.matrix[3][2] == 2
+    assert store.sparse[3, 2] == 2
+    assert store.graph.edges[(3, 2)]["weight"] == 2
+    assert store.graph.edges[(4, 5)]["weight"] == 1
+    assert len(store.graph.nodes) == 10
+
+
+def test_vote_store_views_agree():
+    N = 50
+    store = VoteStore(N)
+    rng = np.random.default_rng(0)
+
+    for _ in range(5):
+        winners = rng.integers(N, size=100)
+        losers = (winners + rng.integers(1, N, size=100)) % N
+        store.record_many(winners, losers)
+
+        assert np.array_equal(store.sparse.toarray(), store.matrix)
+        assert np.array_equal(nx.to_numpy_array(store.graph, nodelist=range(N)), store.matrix)
+
+    assert store.matrix.sum() == store.total == 500
+
+
+def test_index_dtype():
+    assert index_dtype(10) == np.uint8
+    assert index_dtype(256) == np.uint8
+    assert index_dtype(257) == np.uint16
+    assert index_dtype(100_000) == np.uint32
@@ -1,4 +1,7 @@
-from src.pairings import Random, RandomCycles
+import numpy as np
+import pytest
+
+from src.pairings import *
 from src.votes import Vote
 
 
@@ -14,3 +17,103 @@ def test_vote_cls():
     v = Vote(50, budget, RandomCycles, rematch=r, p=0.9)
 
     assert sum(sum(v.comparisons.matrix)) == budget
+
+
+@pytest.mark.parametrize("comparisons_cls", [Random, RandomCycles, CCZip, CCBiggest, CCSlow, FastReachability])
+def test_vote_budget_and_rematch(comparisons_cls):
+    budget = 301
+    v = Vote(20, budget, comparisons_cls, rematch=3, p=0.9)
+
+    assert v.budget == 0
+    assert v.comparisons.votes.total == budget
+    assert sum(sum(v.comparisons.matrix)) == budget
+
+    # Pairs are voted on rematch times in a row
+    winners, losers, _ = v.comparisons.votes.edges()
+    pairs = np.sort(np.stack([winners, losers], axis=1), axis=1).reshape(-1, 1, 2)
+    assert len(pairs) == budget
+    for group in np.split(pairs[:300], 100):
+        assert (group == group[0]).all()
+
+
+def test_next_round():
+    comparisons = RandomCycles(10)
+
+    # Rounds pick up where next_comparison stopped
+    comparisons.next_comparison()
+    assert comparisons.next_round().shape == (9, 2)
+    assert comparisons.next_round().shape == (10, 2)
+
+    pairs = Random(10).next_round()
+    assert pairs.shape == (10, 2)
+    assert (pairs[:, 0] != pairs[:, 1]).all()
+
+
+@pytest.mark.parametrize("comparisons_cls", [Random, RandomCycles, CCBiggest, CCSlow])
+def test_vote_seed(comparisons_cls):
+    a = Vote(30, 200, comparisons_cls, p=0.9, rng=1)
+    b = Vote(30, 200, comparisons_cls, p=0.9, rng=np.random.default_rng(1))
+    c = Vote(30, 200, comparisons_cls, p=0.9, rng=2)
+
+    assert a.true_ranking == b.true_ranking
+    assert np.array_equal(a.comparisons.matrix, b.comparisons.matrix)
+    assert not np.array_equal(a.comparisons.matrix, c.comparisons.matrix)
+
+
+@pytest.mark.parametrize("comparisons_cls", [Random, RandomCycles, CCBiggest])
+def test_extend_continues_the_vote_stream(comparisons_cls):
+    # Budgets cutting through rounds and rematches
+    full = Vote(40, 500, comparisons_cls, rematch=3, p=0.9, rng=5)
+    resumed = Vote(40, 7, comparisons_cls, rematch=3, p=0.9, rng=5)
+    for votes in (50, 101, 342):
+        resumed.extend(votes)
+
+    assert np.array_equal(full.comparisons.matrix, resumed.comparisons.matrix)
+
+
+def test_anytime_matches_fresh_runs():
+    from src.schulze.schulze import Schulze
+
+    milestones = [100, 250, 400]
+    curve = Schulze(40, 0, RandomCycles, rematch=2, p=0.9, rng=1).anytime(milestones)
+
+    assert list(curve) == milestones
+    for budget in milestones:
+        assert curve[budget] == Schulze(40, budget, RandomCycles, rematch=2, p=0.9, rng=1).score()
+
+
+def test_reused_seed_sequence():
+    from src.bradley_terry.bradley_terry import BradleyTerry
+
+    # Built twice from the same SeedSequence, a vote is the same run and has the same cache key
+    seed = np.random.SeedSequence(11)
+    a = BradleyTerry(30, 200, Random, rng=seed)
+    b = BradleyTerry(30, 200, Random, rng=seed)
+
+    assert a.true_ranking == b.true_ranking
+    assert np.array_equal(a.comparisons.votes.matrix, b.comparisons.votes.matrix)
+    assert seed.n_children_spawned == 0
+
+
+class Reversed(Vote):
+    """Votes against the true ranking, through the single_vote hook"""
+
+    def single_vote(self, pair: tuple, ranking: list, p: int = 1):
+        return super().single_vote(pair, ranking[::-1], p)
+
+
+def test_single_vote_hook():
+    v = Vote(10, 0, p=1, rng=0)
+    ranking = v.true_ranking
+    assert v.single_vote((ranking[0], ranking[1])) == (ranking[0], ranking[1])
+    assert v.single_vote((ranking[0], ranking[1]), ranking[::-1]) == (ranking[1], ranking[0])
+    assert v.single_vote((ranking[0], ranking[1]), ranking, p=0) == (ranking[1], ranking[0])
+
+
+
+@pytest.mark.parametrize("comparisons_cls", [Random, RandomCycles, CCBiggest])
+def test_single_vote_hook_is_used_by_every_pairing(comparisons_cls):
+    # Votes go through the hook one by one or by rounds: the worst entry never loses
+    v = Reversed(10, 200, comparisons_cls, rematch=2, p=1, rng=0)
+    assert v.comparisons.votes.total == 200
+    assert v.comparisons.matrix[:, v.true_ranking[0]].sum() == 0
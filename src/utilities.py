@@ -1,48 +1,77 @@
-from itertools import combinations, pairwise
-from random import random, sample
+from itertools import combinations
 
 import networkx as nx
 import numpy as np
-from scipy.stats import kendalltau
 
+from src import metrics
 
-def random_list(size):
+
+def random_cycles(K, N, rng=None) -> np.ndarray:
     """
-    Returns a random cycle of given size using Durstenfeld algorithm
-    https://en.wikipedia.org/wiki/Fisher%E2%80%93Yates_shuffle#The_modern_algorithm
+    Returns K independent uniform random cycles of size N as a (K, N) array
+
+    Each cycle starts at 0 followed by a uniform permutation of 1..N-1, so that each of the (N-1)! cycles up to rotation
+    is drawn once. The permutations of all the rows are drawn in a single call.
 
-    Note: this is faster than np.random.permutation since there are only (n-1)! cycles against n! permutations of size n
+    rng: a numpy Generator or a seed for np.random.default_rng, here and in every function drawing random numbers
     """
+    if N < 2:
+        return np.empty((K, 0), dtype=np.intp)
 
-    if size == 0 or size == 1:
-        return []
+    rng = np.random.default_rng(rng)
+    cycles = np.zeros((K, N), dtype=np.intp)
+    cycles[:, 1:] = rng.permuted(np.tile(np.arange(1, N), (K, 1)), axis=1)
+    return cycles
 
-    items = list(range(size))
 
-    i = len(items) - 1
-    while i > 1:
-        k = np.random.randint(1, i + 1)
-        items[k], items[i] = items[i], items[k]
-        i -= 1
+def random_list(size, rng=None):
+    """
+    Returns a random cycle of given size, see random_cycles
+    """
+    return random_cycles(1, size, rng)[0].tolist()
+
+
+def spawn_generators(rng, n) -> list[np.random.Generator]:
+    """
+    n independent child generators of rng, a numpy Generator, a SeedSequence or a seed
 
-    return items
+    The children of a SeedSequence are derived without spawning from it, so reusing a SeedSequence gives the same
+    children every time
+    """
+    if isinstance(rng, np.random.SeedSequence):
+        return [
+            np.random.default_rng(
+                np.random.SeedSequence(rng.entropy, spawn_key=rng.spawn_key + (i,), pool_size=rng.pool_size)
+            )
+            for i in range(n)
+        ]
+    return np.random.default_rng(rng).spawn(n)
 
 
 def clip(x, minimum, maximum):
     return max(min(x, maximum), minimum)
 
 
-def random_list_from_gaussian_scores(size, m=5, s=2):
-    L = list(range(size))
-    L = list(map(lambda x: {"index": x, "score": clip(np.random.normal(m, s), minimum=0, maximum=10)}, L))
-    return sorted(L, key=lambda x: x["score"])
+def random_list_from_gaussian_scores(size, m=5, s=2, rng=None):
+    scores = np.clip(np.random.default_rng(rng).normal(m, s, size=size), 0, 10)
+    return [{"index": i, "score": scores[i]} for i in np.argsort(scores, kind="stable").tolist()]
+
+
+def cycle_edge_array(cycles) -> np.ndarray:
+    """
+    Returns the edges making a cycle (N,) as an (N, 2) array, or the edges of K cycles (K, N) as a (K, N, 2) array, with
+    each edge sorted
+    """
+    cycles = np.asarray(cycles)
+    following = np.roll(cycles, -1, axis=-1)
+    return np.stack([np.minimum(cycles, following), np.maximum(cycles, following)], axis=-1)
 
 
 def cycle_edges(cycle: list[int]):
     """
     Returns the list of edges making a cycle, with each tuple sorted
     """
-    return sort_tuples([*list(pairwise(cycle)), (cycle[-1], cycle[0])])
+    return list(map(tuple, cycle_edge_array(cycle).tolist()))
 
 
 def sort_tuples(tuples: list[tuple]):
@@ -51,40 +80,39 @@ def sort_tuples(tuples: list[tuple]):
     return list(map(lambda x: tuple(sorted(x)), tuples))
 
 
-def random_expander_edges(k, N):
+def random_expander_edges(k, N, rng=None):
     """
     k = number of random cycles
     N = size of cycles
 
-    Edges to create a random regular expander graph from k random N-cycles sharing no edges. The resulting graph is 2k-regular of degree N.
+    Edges to create a random regular expander graph from k random N-cycles sharing no edges. The resulting graph on N
+    nodes is 2k-regular. A random cycle shares about 2i edges with i cycles already found, so cycles are rejected
+    exponentially often as k grows: this is meant for a few cycles.
 
     Returns the list of edges
     """
     if N < 2:
         return []
     elif N < 5:
-        cycle = range(N)
-        return cycle_edges(cycle)
+        return cycle_edges(range(N))
 
     assert k > 1, "You need at least 2 cycles"
-    assert N * (N - 1) > 2 * k, f"There is not enough room for {k} cycles in a graph of size {N}"
+    assert 2 * k <= N - 1, f"There is not enough room for {k} cycles in a graph of size {N}"
 
-    cycles = []
-    edges = set()
+    rng = np.random.default_rng(rng)
+    # Edge (a, b) with a < b is stored as a * N + b
+    edges = np.empty(0, dtype=np.intp)
+    found = 0
 
-    for i in range(k):
-        while len(edges) != (i + 1) * N:
-            cycle = random_list(N)
+    while found < k:
+        # Candidates are drawn in bulk and kept when they share no edge with the cycles already found
+        for cycle in random_cycles(max(k - found, 32), N, rng):
+            codes = cycle_edge_array(cycle) @ [N, 1]
+            if found < k and not np.isin(codes, edges).any():
+                edges = np.concatenate([edges, codes])
+                found += 1
 
-            cycle_edges = cycle_edges(cycle)
-            cycle_edges_sorted = list(map(sort_tuples, cycle_edges))
-            edges_copy = set([*edges, *cycle_edges_sorted])
-
-            if len(edges_copy) == len(edges) + N:
-                cycles.append(cycle)
-                edges = set([*edges_copy])
-
-    return list(edges)
+    return [(a, b) for a, b in zip(*(part.tolist() for part in np.divmod(np.sort(edges), N)))]
 
 
 def kendall_tau_naive(list_a: list, list_b: list) -> int:
@@ -102,17 +130,15 @@ def kendall_tau_naive(list_a: list, list_b: list) -> int:
 
 
 def make_ranking(L: list):
-    return [L.index(i) for i in range(len(L))]
+    """Position of every element of the permutation L"""
+    return metrics.inverse_permutations(L).tolist()
 
 
 def kendall_tau(list_a, list_b):
     """
-    Uses Scipy implementation to compute kendall tau between two lists.
-
-    Needs to transform permutations into rankings first
+    Normalized Kendall tau distance between two permutations, see metrics.kendall_tau_distance
     """
-    kt, _ = kendalltau(make_ranking(list_a), make_ranking(list_b))
-    return (1 - kt) / 2
+    return metrics.kendall_tau_distance(list_a, list_b)
 
 
 def top_10(ranking_a, ranking_b):
@@ -135,36 +161,27 @@ def weighted_distance(original, permutation):
     """
     Measures how far appart a list an a permutation are. The distance is weighted with weights increasing with index
     """
-    from math import e, exp, sqrt
-
-    N = len(original)
-    ranking_original = make_ranking(original)
-    ranking_other = make_ranking(permutation)
+    return metrics.weighted_distances(original, permutation)
 
-    # Normalize the sum of weights to N
-    normalize = N / ((1 - e ** (-N)) / (1 - e**-1))
-    weights = [normalize * exp(-(N - 1 - i)) for i in range(N)]
-    sq_distance = 0
 
-    data = zip(ranking_original, ranking_other, weights)
-    for rank_original, rank_other, weight in data:
-        sq_distance += ((rank_original - rank_other) ** 2) * weight
-
-    return sqrt(sq_distance)
+def random_ranking(n: int, rng=None) -> list[int]:
+    """A random ranking is a random permutation of size n"""
+    return list(np.random.default_rng(rng).permutation(n))
 
 
-def random_ranking(n: int) -> list[int]:
-    """A random ranking is a random permutation of size n"""
-    return list(np.random.permutation(n))
+# Generator of the votes cast without one
+_vote_rng = np.random.default_rng()
 
 
-def vote(pair: tuple, ranking: list, p=1):
+def vote(pair: tuple, ranking: list, p=1, rng=None):
     """Vote on a pair of entries.
 
     Returns (a,b) with probability p if b is ranked higher than a in the ranking, and (b,a) otherwise
+
+    rng: the numpy Generator to draw from, a module-wide one by default. See Oracle to cast many votes
     """
     a, b = pair
-    r = random()
+    r = (_vote_rng if rng is None else np.random.default_rng(rng)).random()
 
     if ranking.index(a) < ranking.index(b):
         if r < p:
@@ -178,6 +195,44 @@ def vote(pair: tuple, ranking: list, p=1):
             return (a, b)
 
 
+class Oracle:
+    """
+    Simulated voter following a ranking with probability p
+
+    The position of every entry in the ranking is computed once, so that a vote costs O(1)
+    """
+
+    def __init__(self, ranking: list, p=1, rng=None) -> None:
+        self.ranking = ranking
+        self.p = p
+        self.rng = np.random.default_rng(rng)
+        self.position = np.empty(len(ranking), dtype=int)
+        self.position[np.asarray(ranking, dtype=int)] = np.arange(len(ranking))
+        self._position = self.position.tolist()
+
+    def vote(self, pair: tuple):
+        """Same as vote(pair, self.ranking, self.p)"""
+        a, b = pair
+        r = self.rng.random()
+
+        if (self._position[a] < self._position[b]) == (r < self.p):
+            return (a, b)
+        else:
+            return (b, a)
+
+    def votes(self, pairs):
+        """
+        Vote on an array of pairs at once
+
+        Returns the arrays (losers, winners)
+        """
+        a, b = np.asarray(pairs).reshape(-1, 2).T
+        follows = self.rng.random(len(a)) < self.p
+        a_loses = (self.position[a] < self.position[b]) == follows
+
+        return np.where(a_loses, a, b), np.where(a_loses, b, a)
+
+
 def ranking_from_scores(array):
     """
     Returns a ranking in increasing order (best entries at the end) from a list of scores
@@ -0,0 +1,144 @@
+import csv
+import json
+import struct
+from typing import Iterator, Self, Type
+
+import numpy as np
+
+from src.pairings import Pairings
+
+# One vote per record, fields missing from the source are NaN (timestamp, grade) or -1 (annotator)
+RECORD_DTYPE = np.dtype(
+    [("timestamp", "<f8"), ("annotator", "<i4"), ("winner", "<u4"), ("loser", "<u4"), ("grade", "<f4")]
+)
+
+# magic, version, record size, number of entries, number of records
+HEADER = struct.Struct("<8sHHIQ")
+MAGIC = b"VOTELOG\0"
+VERSION = 1
+
+
+class VoteLog:
+    """
+    Append-only binary file of fixed-width vote records, read back as a memory map
+
+    The file is a small header followed by the records, so a log of millions of votes is read chunk by chunk without
+    loading or parsing it
+    """
+
+    def __init__(self, path) -> None:
+        """Opens an existing log, see VoteLog.create for a new one"""
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, itemsize, self.N, self.count = HEADER.unpack(f.read(HEADER.size))
+
+        assert magic == MAGIC, f"{path} is not a vote log"
+        assert version == VERSION and itemsize == RECORD_DTYPE.itemsize, f"Unsupported vote log version {version}"
+
+    @classmethod
+    def create(cls, path, N=0) -> Self:
+        """Writes an empty log for N entries, N grows as votes for bigger entries are appended"""
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, N, 0))
+        return cls(path)
+
+    def __len__(self):
+        return self.count
+
+    def _write_header(self, f):
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, self.N, self.count))
+
+    def append(self, winners, losers, timestamps=np.nan, annotators=-1, grades=np.nan):
+        """Appends a batch of votes, the optional fields are scalars or arrays"""
+        winners = np.asarray(winners)
+        records = np.empty(len(winners), dtype=RECORD_DTYPE)
+        records["winner"] = winners
+        records["loser"] = losers
+        records["timestamp"] = timestamps
+        records["annotator"] = annotators
+        records["grade"] = grades
+
+        if len(records) == 0:
+            return
+
+        with open(self.path, "r+b") as f:
+            f.seek(HEADER.size + self.count * RECORD_DTYPE.itemsize)
+            f.write(records.tobytes())
+            self.count += len(records)
+            self.N = max(self.N, int(records["winner"].max()) + 1, int(records["loser"].max()) + 1)
+            self._write_header(f)
+
+    @property
+    def records(self) -> np.ndarray:
+        """Read-only memory map of the records"""
+        if self.count == 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", offset=HEADER.size, shape=(self.count,))
+
+    def chunks(self, chunk_size=1 << 16) -> Iterator[np.ndarray]:
+        """Consecutive slices of at most chunk_size records, only the slice being read is paged in"""
+        records = self.records
+        for start in range(0, self.count, chunk_size):
+            yield records[start : start + chunk_size]
+
+    def replay(self, comparisons: Pairings, chunk_size=1 << 16, batched=True) -> Pairings:
+        """
+        Records the votes of the log into comparisons, chunk by chunk
+
+        batched: ingest each chunk with record_votes, otherwise vote by vote with record_vote
+        """
+        for chunk in self.chunks(chunk_size):
+            winners, losers = np.array(chunk["winner"]), np.array(chunk["loser"])
+            if batched:
+                comparisons.record_votes(winners, losers)
+            else:
+                for winner, loser in zip(winners.tolist(), losers.tolist()):
+                    comparisons.record_vote(winner, loser)
+
+        return comparisons
+
+    def load(self, comparisons_cls: Type[Pairings] = Pairings, chunk_size=1 << 16) -> Pairings:
+        """A new comparisons_cls over every entry of the log, with all its votes recorded"""
+        return self.replay(comparisons_cls(self.N), chunk_size)
+
+
+def _field(row: dict, name, missing):
+    value = row.get(name)
+    return missing if value is None or value == "" else value
+
+
+def _convert(rows: Iterator[dict], path, N=0, chunk_size=1 << 16) -> VoteLog:
+    """Writes rows with winner, loser and optional timestamp, annotator and grade fields to a new log, by chunks"""
+    log = VoteLog.create(path, N)
+
+    def flush(batch):
+        log.append(
+            [row["winner"] for row in batch],
+            [row["loser"] for row in batch],
+            timestamps=[_field(row, "timestamp", np.nan) for row in batch],
+            annotators=[_field(row, "annotator", -1) for row in batch],
+            grades=[_field(row, "grade", np.nan) for row in batch],
+        )
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk_size:
+            flush(batch)
+            batch = []
+    flush(batch)
+
+    return log
+
+
+def from_csv(csv_path, path, N=0, chunk_size=1 << 16) -> VoteLog:
+    """Converts a csv file with a header row (winner, loser and optional timestamp, annotator, grade columns)"""
+    with open(csv_path, newline="") as f:
+        return _convert(csv.DictReader(f), path, N, chunk_size)
+
+
+def from_jsonl(jsonl_path, path, N=0, chunk_size=1 << 16) -> VoteLog:
+    """Converts a jsonl file of {"winner", "loser"} objects with optional timestamp, annotator and grade keys"""
+    with open(jsonl_path) as f:
+        return _convert((json.loads(line) for line in f if line.strip()), path, N, chunk_size)
@@ -0,0 +1,120 @@
+import networkx as nx
+import numpy as np
+from scipy import sparse
+
+
+def index_dtype(N: int):
+    """Smallest unsigned integer type able to hold the indices of N entries"""
+    return np.min_scalar_type(max(N - 1, 0))
+
+
+class VoteStore:
+    """
+    Append-only log of votes (winner, loser, count) stored in small integer arrays
+
+    The comparison matrix, its sparse CSR version and the networkx graph are views materialized lazily from the log.
+    Each view remembers how far in the log it has been synced, so materializing it again only replays the new votes.
+    """
+
+    def __init__(self, N, capacity=1024) -> None:
+        self.N = N
+        self.total = 0
+
+        dtype = index_dtype(N)
+        self._winners = np.empty(capacity, dtype=dtype)
+        self._losers = np.empty(capacity, dtype=dtype)
+        self._counts = np.empty(capacity, dtype=np.uint16)
+        self._size = 0
+
+        self._csr = sparse.csr_array((N, N), dtype=np.int32)
+        self._csr_synced = 0
+        self._matrix = None
+        self._matrix_synced = 0
+        self._graph = None
+        self._graph_synced = 0
+
+    def __len__(self):
+        return self._size
+
+    def _reserve(self, n):
+        if self._size + n <= len(self._winners):
+            return
+
+        capacity = max(2 * len(self._winners), self._size + n)
+        for name in ("_winners", "_losers", "_counts"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[: self._size] = old[: self._size]
+            setattr(self, name, new)
+
+    def record(self, winner, loser, count=1):
+        self._reserve(1)
+        self._winners[self._size] = winner
+        self._losers[self._size] = loser
+        self._counts[self._size] = count
+        self._size += 1
+        self.total += count
+
+    def record_many(self, winners, losers, counts=1):
+        """Appends a batch of votes at once"""
+        winners = np.asarray(winners)
+        n = len(winners)
+        self._reserve(n)
+
+        end = self._size + n
+        self._winners[self._size : end] = winners
+        self._losers[self._size : end] = losers
+        self._counts[self._size : end] = counts
+        self._size = end
+        self.total += int(self._counts[end - n : end].sum())
+
+    def edges(self, start=0, stop=None):
+        """Returns views (winners, losers, counts) on the log"""
+        stop = self._size if stop is None else stop
+        return self._winners[start:stop], self._losers[start:stop], self._counts[start:stop]
+
+    def compact(self):
+        """Folds the new votes of the log into the CSR matrix and returns it"""
+        if self._csr_synced < self._size:
+            winners, losers, counts = self.edges(self._csr_synced)
+            delta = sparse.csr_array((counts.astype(np.int32), (winners, losers)), shape=(self.N, self.N))
+            self._csr = self._csr + delta
+            self._csr_synced = self._size
+
+        return self._csr
+
+    @property
+    def sparse(self):
+        """CSR matrix with coefficient i,j the number of times i beats j"""
+        return self.compact()
+
+    @property
+    def matrix(self):
+        """Dense matrix with coefficient i,j the number of times i beats j"""
+        if self._matrix is None:
+            self._matrix = np.zeros((self.N, self.N))
+
+        if self._matrix_synced < self._size:
+            winners, losers, counts = self.edges(self._matrix_synced)
+            np.add.at(self._matrix, (winners, losers), counts)
+            self._matrix_synced = self._size
+
+        return self._matrix
+
+    @property
+    def graph(self):
+        """Directed graph with an edge winner -> loser weighted by the number of such votes"""
+        if self._graph is None:
+            self._graph = nx.DiGraph()
+            self._graph.add_nodes_from(range(self.N))
+
+        if self._graph_synced < self._size:
+            G = self._graph
+            for winner, loser, count in zip(*(a.tolist() for a in self.edges(self._graph_synced))):
+                if G.has_edge(winner, loser):
+                    G[winner][loser]["weight"] += count
+                else:
+                    G.add_edge(winner, loser, weight=count)
+            self._graph_synced = self._size
+
+        return self._graph
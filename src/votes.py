@@ -1,49 +1,223 @@
+import time
 from typing import Self, Type
 
+import numpy as np
+
+from src.cache import ResultCache, seed_fingerprint
+from src.instrumentation import Profiler
 from src.pairings import *
 from src.utilities import *
 
 
 class Vote:
-    def __init__(self, N=500, budget=1000, comparisons_cls: Type[Pairings] = Random, rematch=1, p=1) -> None:
+    # Results of the runs with a reproducible seed are looked up in / saved to this cache, None to disable it
+    cache: ResultCache = None
+
+    def __init__(
+        self,
+        N=500,
+        budget=1000,
+        comparisons_cls: Type[Pairings] = Random,
+        rematch=1,
+        p=1,
+        rng=None,
+        cache: ResultCache = None,
+        profiler: Profiler = None,
+    ) -> None:
+        """
+        rng: a numpy Generator, a SeedSequence or a seed. The true ranking, the pairings and the oracle draw from
+        independent child generators
+        cache: overrides the class cache. When the result of the same run (classes, parameters, int or SeedSequence seed
+        and source code) is cached, score() uses the cached ranking and the votes are only simulated when the
+        comparisons are read (e.g. by rank()), giving the same votes as without cache. Settings held in class
+        attributes (e.g. BlockedSchulze.tile_size) are not part of the key.
+        profiler: times the voting, pairing and ranking methods of this vote, see Profiler.instrument_vote
+        """
         self.N = N
-        self.comparisons = comparisons_cls(N)
+        self._unsimulated = False
+        if cache is not None:
+            self.cache = cache
+        self.rng = np.random.default_rng(rng)
+        ranking_rng, comparisons_rng, oracle_rng = spawn_generators(rng, 3)
+
+        self.comparisons = comparisons_cls(N, rng=comparisons_rng)
         self.budget = budget
         self.rematch = rematch
         self.p = p
-        self.true_ranking = random_list(N)
+        self.true_ranking = random_list(N, ranking_rng)
+        self.oracle = Oracle(self.true_ranking, p, rng=oracle_rng)
+        self._backlog = None
+        self._rematches = 0
+        if profiler is not None:
+            profiler.instrument_vote(self)
+
+        self._cache_key = self.cache_key(rng)
+        self.cached = self.cache.get(self._cache_key) if self._cache_key is not None else None
+        self._unsimulated = True
+        if self.cached is None:
+            self.comparisons
+
+    @property
+    def comparisons(self) -> Pairings:
+        # The votes of a cached run are simulated the first time they are read
+        if self._unsimulated:
+            self._unsimulated = False
+            start = time.perf_counter()
+            self.start_vote()
+            self.vote_seconds = time.perf_counter() - start
+
+        return self._comparisons
+
+    @comparisons.setter
+    def comparisons(self, comparisons: Pairings):
+        self._comparisons = comparisons
 
-        self.start_vote()
+    def cache_key(self, rng) -> str | None:
+        """Cache address of this run, None when there is no cache or the run can't be reproduced"""
+        seed = seed_fingerprint(rng)
+        if self.cache is None or seed is None or self.budget == 0:
+            return None
+
+        return self.cache.key(
+            vote_cls=f"{type(self).__module__}.{type(self).__qualname__}",
+            comparisons_cls=f"{type(self.comparisons).__module__}.{type(self.comparisons).__qualname__}",
+            N=self.N,
+            budget=self.budget,
+            p=self.p,
+            rematch=self.rematch,
+            seed=seed,
+        )
+
+    @classmethod
+    def from_comparisons(cls, comparisons: Pairings, true_ranking: list[int] = None) -> Self:
+        """
+        A ranker over the votes already recorded in comparisons, nothing is simulated
+
+        The votes can be shared by several rankers as long as none of them votes again. Without a true ranking (real
+        votes, e.g. from a VoteLog) the ranker can rank but not score.
+        """
+        vote = cls.__new__(cls)
+        vote.N = comparisons.N
+        vote._unsimulated = False
+        vote.comparisons = comparisons
+        vote.budget = 0
+        vote.true_ranking = true_ranking
+        vote._backlog = None
+        vote._rematches = 0
+        vote._cache_key = None
+        vote.cached = None
+        return vote
 
     def start_vote(self) -> Self:
+        """
+        Votes until the budget is exhausted. The votes of a round or of a rematch left over by the budget are kept, so
+        that adding budget and voting again continues the same vote stream.
+        """
         while self.budget > 0:
-            (i, j) = self.next_comparison()
-
-            n = self.rematch
-            while n > 0:
-                (loser, winner) = self.single_vote((i, j), self.true_ranking, self.p)
-                self.comparisons.record_vote(winner, loser)
-                self.budget -= 1
-                n -= 1
-
-                if self.budget == 0:
-                    break
-            else:
+            if self._rematches > 0:
+                self.vote_comparison()
                 continue
-            break
+
+            if self._backlog is None:
+                pairs = self.next_round()
+
+                if pairs is None:
+                    self.vote_comparison()
+                    continue
+
+                # Every pair is voted on rematch times in a row
+                self._backlog = np.repeat(pairs, self.rematch, axis=0)
+
+            pairs, backlog = self._backlog[: self.budget], self._backlog[self.budget :]
+            self._backlog = backlog if len(backlog) > 0 else None
+            (losers, winners) = self.batch_vote(pairs)
+            self.comparisons.record_votes(winners, losers)
+            self.budget -= len(pairs)
+
         return self
 
+    def vote_comparison(self):
+        if self._rematches == 0:
+            self._pair = self.next_comparison()
+            self._rematches = self.rematch
+
+        while self._rematches > 0 and self.budget > 0:
+            (loser, winner) = self.single_vote(self._pair, self.true_ranking, self.p)
+            self.comparisons.record_vote(winner, loser)
+            self.budget -= 1
+            self._rematches -= 1
+
+    def extend(self, votes) -> Self:
+        """Casts `votes` more votes, continuing the vote stream where it stopped"""
+        # The votes of a cached run are simulated first
+        self.comparisons
+        self._cache_key = None
+        self.cached = None
+        self.budget += votes
+        return self.start_vote()
+
+    def anytime(self, milestones, func=top_10) -> dict[int, float]:
+        """
+        Scores a single vote stream each time the total number of votes reaches a milestone
+
+        Start from an empty vote, e.g. BradleyTerry(N, 0, Random).anytime(range(1000, 10000, 1000)). Rankers with an
+        iterative solver warm start from the previous milestone.
+
+        Returns the {milestone: score} curve
+        """
+        curve = {}
+        for milestone in sorted(milestones):
+            self.extend(max(milestone - self.comparisons.votes.total, 0))
+            curve[milestone] = float(self.score(func))
+
+        return curve
+
     def next_comparison(self):
         # Subclasses can hook into this function
         return self.comparisons.next_comparison()
 
-    def single_vote(self, pair: tuple, ranking: list, p: int = 1):
+    def next_round(self):
         # Subclasses can hook into this function
-        return vote(pair, ranking, p)
+        return self.comparisons.next_round()
+
+    def single_vote(self, pair: tuple, ranking: list = None, p: float = None):
+        # Subclasses can hook into this function. The ranking and p default to the oracle's
+        ranking = self.oracle.ranking if ranking is None else ranking
+        p = self.oracle.p if p is None else p
+        if ranking is self.oracle.ranking and p == self.oracle.p:
+            return self.oracle.vote(pair)
+        return vote(pair, ranking, p, rng=self.oracle.rng)
+
+    def batch_vote(self, pairs):
+        # Subclasses can hook into this function. Subclasses overriding single_vote get every vote of the round from it
+        if type(self).single_vote is not Vote.single_vote:
+            votes = [self.single_vote(pair, self.true_ranking, self.p) for pair in map(tuple, pairs.tolist())]
+            losers, winners = np.array(votes, dtype=int).reshape(-1, 2).T
+            return losers, winners
+
+        return self.oracle.votes(pairs)
 
     def rank(self) -> list[int]:
         # Subclasses must implement this function
         pass
 
     def score(self, func=top_10):
-        return func(self.true_ranking, self.rank())
+        if self.cached is not None:
+            return func(self.true_ranking, self.cached["ranking"])
+
+        start = time.perf_counter()
+        ranking = self.rank()
+        rank_seconds = time.perf_counter() - start
+        score = func(self.true_ranking, ranking)
+
+        if self._cache_key is not None:
+            self.cache.put(
+                self._cache_key,
+                {
+                    "ranking": [int(i) for i in ranking],
+                    "score": {func.__name__: float(score)},
+                    "seconds": {"vote": self.vote_seconds, "rank": rank_seconds},
+                },
+            )
+
+        return score